@@ -21,12 +21,14 @@ from future.builtins.disabled import *  # noqa  pylint: disable=W0401, W0614
 
 # === End Python 2/3 compatibility
 
+import collections
 import pickle
 import os
 import time
 
 import numpy as np
 import scipy.linalg as la
+import scipy.sparse as sparse
 import h5py
 
 from caput import mpiutil
@@ -53,7 +55,8 @@ def svd_gen(A, errmsg=None, *args, **kwargs):
         res = la.svd(A, *args, **kwargs)
     except la.LinAlgError:
         sv = la.svdvals(A)[0]
-        At = A + sv * 1e-10 * np.eye(A.shape[0], A.shape[1])
+        At = A.copy()
+        At[np.diag_indices(min(A.shape))] += sv * 1e-10
         try:
             res = la.svd(At, *args, **kwargs)
         except la.LinAlgError as e:
@@ -68,14 +71,94 @@ def svd_gen(A, errmsg=None, *args, **kwargs):
     return res
 
 
-def matrix_image(A, rtol=1e-8, atol=None, errmsg=""):
+def svd_thin_gram(A):
+    """Thin SVD of a tall matrix (or stack of them) via its Gram matrix.
+
+    This eigendecomposes the small matrix :math:`A^H A` rather than
+    decomposing `A` directly, which is substantially faster when `A` has many
+    more rows than columns. As the Gram matrix squares the condition number,
+    singular values below about `sqrt(eps)` of the largest are inaccurate,
+    though the left singular vectors are always orthonormal.
+
+    Parameters
+    ----------
+    A : np.ndarray[..., n, k]
+        Matrix to decompose, with `n >= k`.
+
+    Returns
+    -------
+    u : np.ndarray[..., n, k]
+        Left singular vectors.
+    s : np.ndarray[..., k]
+        Singular values in descending order.
+    vh : np.ndarray[..., k, k]
+        Conjugate transpose of the right singular vectors.
+    """
+
+    ah = np.swapaxes(A, -1, -2).conj()
+
+    # Eigendecompose the Gram matrix and reorder into descending order
+    w, v = np.linalg.eigh(np.matmul(ah, A))
+    w, v = w[..., ::-1], v[..., ::-1]
+
+    s = np.sqrt(np.maximum(w, 0.0))
+
+    # Rather than dividing A V by the singular values (which is unstable for
+    # the small ones), orthonormalise it and fix the phase of each vector from
+    # the diagonal of R
+    q, r = np.linalg.qr(np.matmul(A, v))
+    rd = np.diagonal(r, axis1=-2, axis2=-1)
+    phase = np.ones_like(rd)
+    np.divide(rd, np.abs(rd), out=phase, where=(rd != 0.0))
+    u = q * phase[..., np.newaxis, :]
+
+    return u, s, np.swapaxes(v, -1, -2).conj()
+
+
+def _is_tall(A):
+    # Is the matrix tall enough to use the Gram matrix SVD
+    return A.shape[-2] > 2 * A.shape[-1]
+
+
+def _svd_stack(A, errmsg="", gram=False):
+    # Find the thin SVD of every matrix in the stack `A` with a single batched
+    # call. If this fails to converge, fall back to regularising the offending
+    # matrices one by one with `svd_gen`. If `gram` is set, use the Gram matrix
+    # method for tall matrices.
+    try:
+        if gram and _is_tall(A):
+            return svd_thin_gram(A)
+        u, s, vh = np.linalg.svd(A, full_matrices=False)
+    except np.linalg.LinAlgError:
+        res = [
+            svd_gen(Ai, errmsg="%s (block %i)" % (errmsg, i), full_matrices=False)
+            for i, Ai in enumerate(A)
+        ]
+        u, s, vh = [np.array(r) for r in zip(*res)]
+
+    return u, s, vh
+
+
+def matrix_image(A, rtol=1e-8, atol=None, errmsg="", gram=False, full_output=False):
+    # If `full_output` is set, also return whether the image and spectrum are
+    # accurate singular vectors and values of `A`. They are not if the Gram
+    # matrix method, or the final QR fallback, was used.
 
     if A.shape[0] == 0:
-        return np.array([], dtype=A.dtype).reshape(0, 0), np.array([], dtype=np.float64)
+        image = np.array([], dtype=A.dtype).reshape(0, 0)
+        spectrum = np.array([], dtype=np.float64)
+        return (image, spectrum, True) if full_output else (image, spectrum)
+
+    exact = True
 
     try:
-        # First try SVD to find matrix image
-        u, s, v = la.svd(A, full_matrices=False)
+        # First try SVD to find matrix image. If requested use the cheaper Gram
+        # matrix method if the matrix is tall.
+        if gram and _is_tall(A):
+            u, s, v = svd_thin_gram(A)
+            exact = False
+        else:
+            u, s, v = la.svd(A, full_matrices=False)
 
         image, spectrum = u, s
 
@@ -97,15 +180,17 @@ def matrix_image(A, rtol=1e-8, atol=None, errmsg=""):
 
             image = q
             spectrum = np.abs(r.diagonal())
+            exact = False
 
-    if atol is None:
-        cut = (spectrum > spectrum[0] * rtol).sum()
-    else:
-        cut = (spectrum > atol).sum()
+    # The spectrum is in descending order so we can just search for the cut
+    thresh = spectrum[0] * rtol if atol is None else atol
+    cut = int(np.searchsorted(-spectrum, -thresh, side="left"))
 
-    image = image[:, :cut].copy()
+    # Return a view, callers only use this to project so there's no need to
+    # copy into a new array
+    image = image[:, :cut]
 
-    return image, spectrum
+    return (image, spectrum, exact) if full_output else (image, spectrum)
 
 
 def matrix_nullspace(A, rtol=1e-8, atol=None, errmsg=""):
@@ -114,8 +199,11 @@ def matrix_nullspace(A, rtol=1e-8, atol=None, errmsg=""):
         return np.array([], dtype=A.dtype).reshape(0, 0), np.array([], dtype=np.float64)
 
     try:
-        # First try SVD to find matrix nullspace
-        u, s, v = la.svd(A, full_matrices=True)
+        # First try SVD to find matrix nullspace. We need all the left singular
+        # vectors, but only ask for the full set when the matrix is tall, as
+        # otherwise the thin SVD already has them all and we avoid calculating
+        # a large, unused, set of right singular vectors.
+        u, s, v = la.svd(A, full_matrices=(A.shape[0] > A.shape[1]))
 
         nullspace, spectrum = u, s
 
@@ -138,16 +226,85 @@ def matrix_nullspace(A, rtol=1e-8, atol=None, errmsg=""):
             nullspace = q
             spectrum = np.abs(r.diagonal())
 
-    if atol is None:
-        cut = (spectrum >= spectrum[0] * rtol).sum()
-    else:
-        cut = (spectrum >= atol).sum()
+    # The spectrum is in descending order so we can just search for the cut
+    thresh = spectrum[0] * rtol if atol is None else atol
+    cut = int(np.searchsorted(-spectrum, -thresh, side="right"))
 
-    nullspace = nullspace[:, cut:].copy()
+    nullspace = nullspace[:, cut:]
 
     return nullspace, spectrum
 
 
+def matrix_image_randomized(A, rank_guess, rtol=1e-8, npower=2, nover=10, errmsg=""):
+    """Find the image of a matrix using a randomized range finder.
+
+    This is much cheaper than :func:`matrix_image` when the image is small
+    compared to the size of the matrix. The sketch is enlarged until it
+    resolves the cut in the singular values, and if it grows beyond half the
+    matrix size we fall back to the full SVD.
+
+    Parameters
+    ----------
+    A : np.ndarray[n, m]
+        Matrix to find the image of.
+    rank_guess : integer
+        Initial guess at the dimension of the image.
+    rtol : float, optional
+        Cut on the singular values relative to the largest.
+    npower : integer, optional
+        Number of power iterations to use.
+    nover : integer, optional
+        Number of vectors to oversample the sketch by.
+
+    Returns
+    -------
+    image : np.ndarray[n, k]
+        Orthonormal basis for the image of `A`.
+    spectrum : np.ndarray
+        Leading singular values of `A`.
+    """
+
+    nmin = min(A.shape)
+    k = max(rank_guess, 1) + nover
+
+    # Use a fixed seed so the results are reproducible
+    rs = np.random.RandomState(0)
+
+    while 2 * k < nmin:
+
+        omega = rs.standard_normal((A.shape[1], k))
+        if np.iscomplexobj(A):
+            omega = omega + 1j * rs.standard_normal((A.shape[1], k))
+
+        # Power iterate to sharpen the spectrum, re-orthonormalising to
+        # avoid losing the smaller modes to rounding error
+        q = la.qr(np.dot(A, omega), mode="economic")[0]
+        for pi in range(npower):
+            q = la.qr(np.dot(A.T.conj(), q), mode="economic")[0]
+            q = la.qr(np.dot(A, q), mode="economic")[0]
+
+        try:
+            u, s, v = la.svd(np.dot(q.T.conj(), A), full_matrices=False)
+        except la.LinAlgError:
+            break
+
+        # If the sketch has resolved the cut, find the image within it,
+        # otherwise try again with a larger sketch
+        if s[-1] <= s[0] * rtol:
+            cut = (s > s[0] * rtol).sum()
+            return np.dot(q, u[:, :cut]), s
+
+        k *= 2
+
+    return matrix_image(A, rtol=rtol, errmsg=errmsg)
+
+
+def _chunk_rows(nrows, row_bytes, max_bytes):
+    # Number of rows of `row_bytes` each to put into an HDF5 chunk such that
+    # it is as large as possible without exceeding `max_bytes`.
+    return int(min(nrows, max(1, max_bytes // row_bytes)))
+
+
 class BeamTransfer(object):
     """A class for reading and writing Beam Transfer matrices from disk.
 
@@ -161,11 +318,17 @@ class BeamTransfer(object):
     telescope : drift.core.telescope.TransitTelescope, optional
         Telescope object to use for calculation. If `None` (default), try to
         load a cached version from the given directory.
+    compression : bool, optional
+        Compress the beam transfer files on disk (using gzip with the shuffle
+        filter). Default is no compression, which is fastest for the write-once
+        read-once access pattern of generation.
 
     Attributes
     ----------
     svcut
     polsvcut
+    compression
+    svd_single_precision
     ntel
     nsky
     nfreq
@@ -182,6 +345,8 @@ class BeamTransfer(object):
     beam_ut
     invbeam_svd
     beam_singularvalues
+    noise_power
+    clear_cache
     generate
     project_vector_sky_to_telescope
     project_vector_telescope_to_sky
@@ -194,9 +359,37 @@ class BeamTransfer(object):
 
     _mem_switch = 2.0  # Rough chunks (in GB) to divide calculation into.
 
+    _chunk_max_bytes = 8 * 2 ** 20  # Target size of HDF5 chunks for beam files
+    _rdcc_nbytes = 256 * 2 ** 20  # Size of HDF5 chunk cache when accessing beams
+    _proj_block_bytes = 64 * 2 ** 20  # Target size of buffers for SVD projections
+
     svcut = 1e-6
     polsvcut = 1e-4
 
+    compression = False
+
+    # Store the SVD beams (but not the singular values) in single precision.
+    # The calculation is still done in double precision.
+    svd_single_precision = False
+
+    svd_threads = 1  # Number of threads to use when generating the SVD files
+
+    # Use a randomized SVD to find the sky modes before the polarisation
+    # projection. Only worthwhile if these are much fewer than the telescope
+    # and sky degrees of freedom.
+    svd_randomized = False
+
+    # Find the final SVD of each block via the eigendecomposition of its Gram
+    # matrix when it has many more telescope than sky degrees of freedom. This
+    # is faster but loses accuracy on singular values below ~1e-8 of the
+    # largest.
+    svd_gram = False
+
+    # Write the SVD files in the HDF5 1.10 file format, which has more
+    # efficient indexes for their chunked datasets. The files then can't be
+    # read with HDF5 versions before 1.10.
+    svd_hdf5_v110 = False
+
     # ====== Properties giving internal filenames =======
 
     @property
@@ -238,15 +431,25 @@ class BeamTransfer(object):
     # ===================================================
 
     @property
-    def _telescope_pickle(self):
-        # The pickled telescope object
-        return pickle.dumps(self.telescope)
+    def telescope(self):
+        """The telescope object the beam transfers are calculated for."""
+        return self._telescope
 
-    def __init__(self, directory, telescope=None):
+    @telescope.setter
+    def telescope(self, tel):
+        # Reset anything cached from the previous telescope
+        self._telescope = tel
+        self._noisew_cache = {}
+        self.clear_cache()
+
+    def __init__(self, directory, telescope=None, compression=None):
 
         self.directory = directory
         self.telescope = telescope
 
+        if compression is not None:
+            self.compression = compression
+
         # Create directory if required
         if mpiutil.rank0 and not os.path.exists(directory):
             os.makedirs(directory)
@@ -264,19 +467,116 @@ class BeamTransfer(object):
 
     # ===================================================
 
+    # ====== Dataset creation ===========================
+
+    @property
+    def _compression_args(self):
+        # Keyword arguments for creating the beam transfer datasets
+        if self.compression:
+            return {"compression": "gzip", "compression_opts": 1, "shuffle": True}
+        return {}
+
+    @property
+    def _svd_dtype(self):
+        # The type to store the SVD beam matrices as
+        return np.complex64 if self.svd_single_precision else np.complex128
+
+    @property
+    def _svd_chunks(self):
+        # Chunk shapes for the SVD datasets. The SVD files are read either a
+        # whole m or a single frequency at a time, so each chunk holds all the
+        # modes at one frequency, or as much of them as fits within the target
+        # chunk size.
+        npol = self.telescope.num_pol_sky
+        lside = self.telescope.lmax + 1
+        itemsize = np.dtype(self._svd_dtype).itemsize
+
+        return {
+            "beam_svd": (
+                1,
+                _chunk_rows(
+                    self.svd_len, npol * lside * itemsize, self._chunk_max_bytes
+                ),
+                npol,
+                lside,
+            ),
+            "invbeam_svd": (
+                1,
+                npol,
+                _chunk_rows(
+                    lside, npol * self.svd_len * itemsize, self._chunk_max_bytes
+                ),
+                self.svd_len,
+            ),
+            "beam_ut": (
+                1,
+                _chunk_rows(self.svd_len, self.ntel * itemsize, self._chunk_max_bytes),
+                self.ntel,
+            ),
+        }
+
+    # ===================================================
+
+    # ====== Noise weighting ============================
+
+    def noise_power(self):
+        """The noise power for each telescope degree of freedom.
+
+        This depends only on the telescope, so it is evaluated for all
+        frequencies in a single call and cached rather than recalculated for
+        every m.
+
+        Returns
+        -------
+        noise : np.ndarray (nfreq, ntel)
+            Noise power for both signs of m, for each baseline. Read only.
+        """
+
+        if "power" not in self._noisew_cache:
+            noise = self.telescope.noisepower(
+                np.arange(self.telescope.npairs)[np.newaxis, :],
+                np.arange(self.nfreq)[:, np.newaxis],
+            ).reshape(self.nfreq, self.telescope.npairs)
+            noise = np.concatenate([noise, noise], axis=-1)
+            noise.flags.writeable = False
+
+            self._noisew_cache["power"] = noise
+
+        return self._noisew_cache["power"]
+
+    def _noise_weight(self, fi=None):
+        ## The inverse square root of the noise power for each telescope degree
+        ## of freedom at frequency `fi`, or if `fi` is None for all frequencies
+        ## packed as (nfreq, ntel).
+
+        if "weight" not in self._noisew_cache:
+            noisew = self.noise_power() ** (-0.5)
+            noisew.flags.writeable = False
+
+            self._noisew_cache["weight"] = noisew
+
+        noisew = self._noisew_cache["weight"]
+
+        return noisew if fi is None else noisew[fi]
+
+    # ===================================================
+
     # ====== Loading m-order beams ======================
 
     def _load_beam_m(self, mi, fi=None):
         ## Read in beam from disk
-        mfile = h5py.File(self._mfile(mi), "r")
-
-        # If fi is None, return all frequency blocks. Otherwise just the one requested.
-        if fi is None:
-            beam = mfile["beam_m"][:]
-        else:
-            beam = mfile["beam_m"][fi][:]
-
-        mfile.close()
+        with h5py.File(self._mfile(mi), "r", rdcc_nbytes=self._rdcc_nbytes) as mfile:
+            dset = mfile["beam_m"]
+
+            # If fi is None, return all frequency blocks. Otherwise just the one
+            # requested. Read straight into a contiguous array, so that
+            # reshaping the beam into a matrix later does not need a copy.
+            if fi is None:
+                beam = np.empty(dset.shape, dtype=dset.dtype)
+                dset.read_direct(beam)
+            else:
+                beam = np.empty(dset.shape[1:], dtype=dset.dtype)
+                dset.read_direct(beam, source_sel=np.s_[fi])
 
         return beam
 
@@ -308,7 +608,7 @@ class BeamTransfer(object):
         tel = self.telescope
         mside = 2 * tel.lmax + 1 if fullm else 2 * tel.mmax + 1
 
-        ffile = h5py.File(self._ffile(fi), "r")
+        ffile = h5py.File(self._ffile(fi), "r", rdcc_nbytes=self._rdcc_nbytes)
         beamf = ffile["beam_freq"][:]
         ffile.close()
 
@@ -317,8 +617,11 @@ class BeamTransfer(object):
                 beamf.shape[:-1] + (2 * tel.lmax + 1,), dtype=np.complex128
             )
 
-            for mi in range(-tel.mmax, tel.mmax + 1):
-                beamt[..., mi] = beamf[..., mi]
+            # Copy the positive m's to the start, and the negative m's (which are
+            # wrapped around) to the end
+            nm = tel.mmax + 1
+            beamt[..., :nm] = beamf[..., :nm]
+            beamt[..., (beamt.shape[-1] - tel.mmax) :] = beamf[..., nm:]
 
             beamf = beamt
 
@@ -352,11 +655,13 @@ class BeamTransfer(object):
 
         bfc = np.zeros((mside, 2) + bf.shape[:-1], dtype=bf.dtype)
 
-        bfc[0, 0] = bf[..., 0]
+        # Positive m's go straight in, the negative m's (wrapped around at the
+        # end) are conjugated and have the (-1)^m phase applied
+        signs = (-1) ** np.arange(1, mside)
+        signs = signs.reshape((-1,) + (1,) * (bf.ndim - 1))
 
-        for mi in range(1, mside):
-            bfc[mi, 0] = bf[..., mi]
-            bfc[mi, 1] = (-1) ** mi * bf[..., -mi].conj()
+        bfc[:, 0] = np.moveaxis(bf[..., :mside], -1, 0)
+        bfc[1:, 1] = signs * np.moveaxis(bf[..., -1:-mside:-1], -1, 0).conj()
 
         return bfc
 
@@ -372,7 +677,8 @@ class BeamTransfer(object):
 
         Uses the Moore-Penrose Pseudo-inverse as the optimal inverse for
         reconstructing the data. No `single` option as this only makes sense
-        when combined.
+        when combined. If `noise_weight` is set, the beam at each frequency is
+        prewhitened by the noise at that frequency before inverting.
 
         Parameters
         ----------
@@ -386,20 +692,18 @@ class BeamTransfer(object):
 
         beam = self.beam_m(mi)
 
-        if self.noise_weight:
-            noisew = self.telescope.noisepower(
-                np.arange(self.telescope.npairs), 0
-            ).flatten() ** (-0.5)
-            beam = beam * noisew[:, np.newaxis, np.newaxis]
-
         beam = beam.reshape((self.nfreq, self.ntel, self.nsky))
 
+        # Prewhiten the beams at all frequencies at once, using the noise at
+        # each frequency
+        if self.noise_weight:
+            noisew = self._noise_weight()
+            beam = beam * noisew[:, :, np.newaxis]
+
         ibeam = blockla.pinv_dm(beam, rcond=1e-6)
 
         if self.noise_weight:
-            # Reshape to make it easy to multiply baselines by noise level
-            ibeam = ibeam.reshape((-1, self.telescope.npairs))
-            ibeam = ibeam * noisew
+            ibeam *= noisew[:, np.newaxis, :]
 
         shape = (
             self.nfreq,
@@ -414,7 +718,93 @@ class BeamTransfer(object):
 
     # ====== SVD Beam loading ===========================
 
-    @util.cache_last
+    svd_cache_size = 1  # Number of m's to keep each SVD dataset in memory for
+
+    def clear_cache(self):
+        """Drop any SVD beams and mode counts held in memory.
+
+        This also closes any SVD file held open for reading.
+        """
+        self._svd_cache = {}
+        self._svd_num_cache = {}
+
+        if getattr(self, "_svd_fh", None) is not None:
+            self._svd_fh[1].close()
+        self._svd_fh = None
+
+    def _svdfile_h5(self, mi, mode="r"):
+        ## Open the SVD file for `mi`. When reading, the chunk cache is made
+        ## large enough to hold several frequencies of any of the datasets, and
+        ## as these files are written once and then read, fully read chunks are
+        ## evicted first. If `svd_hdf5_v110` is set, new files are written in
+        ## the HDF5 1.10 format.
+        if mode == "r":
+            return h5py.File(
+                self._svdfile(mi), "r", rdcc_nbytes=self._rdcc_nbytes, rdcc_w0=1.0
+            )
+        if self.svd_hdf5_v110:
+            return h5py.File(self._svdfile(mi), mode, libver=("v110", "latest"))
+        return h5py.File(self._svdfile(mi), mode)
+
+    def _open_svdfile(self, mi):
+        ## Return an open (read only) handle to the SVD file for `mi`. The file
+        ## for the last m requested is kept open, so that fetching several of
+        ## its datasets only needs a single open.
+
+        if self._svd_fh is None or self._svd_fh[0] != mi:
+            if self._svd_fh is not None:
+                self._svd_fh[1].close()
+                self._svd_fh = None
+
+            self._svd_fh = (mi, self._svdfile_h5(mi, "r"))
+
+        return self._svd_fh[1]
+
+    def _cached_svd_dataset(self, mi, name, fi=None):
+        ## Fetch dataset `name` for `mi` (and optionally just the block `fi`)
+        ## keeping the full arrays for the last `svd_cache_size` m's that were
+        ## requested in memory.
+
+        cache = self._svd_cache.setdefault(name, collections.OrderedDict())
+
+        if mi in cache:
+            # Move to the end to mark as most recently used
+            arr = cache.pop(mi)
+            cache[mi] = arr
+        elif fi is not None or self.svd_cache_size < 1:
+            return self._load_svd_dataset(mi, name, fi=fi)
+        else:
+            arr = self._load_svd_dataset(mi, name)
+            cache[mi] = arr
+
+            while len(cache) > self.svd_cache_size:
+                cache.popitem(last=False)
+
+        return arr if fi is None else arr[fi]
+
+    def _load_svd_dataset(self, mi, name, fi=None, out=None):
+        ## Read dataset `name` from the SVD file for `mi`, either for all
+        ## frequencies or just the block `fi`. If `out` is given, read directly
+        ## into it rather than allocating a new array.
+
+        dset = self._open_svdfile(mi)[name]
+
+        # Required array shape depends on whether we are returning all
+        # frequency blocks or not.
+        shape = dset.shape if fi is None else dset.shape[1:]
+
+        if out is None:
+            out = np.empty(shape, dtype=dset.dtype)
+        elif out.shape != shape or not out.flags.c_contiguous:
+            raise ValueError(
+                "Output array must be C contiguous with shape %s (got %s)."
+                % (repr(shape), repr(out.shape))
+            )
+
+        dset.read_direct(out, source_sel=(np.s_[:] if fi is None else np.s_[fi]))
+
+        return out
+
     def beam_svd(self, mi, fi=None):
         """Fetch the SVD beam transfer matrix (S V^H) for a given m. This SVD beam
         transfer projects from the sky into the SVD basis.
@@ -434,19 +824,8 @@ class BeamTransfer(object):
         beam : np.ndarray (nfreq, svd_len, npol_sky, lmax+1)
         """
 
-        svdfile = h5py.File(self._svdfile(mi), "r")
-
-        # Required array shape depends on whether we are returning all frequency blocks or not.
-        if fi is None:
-            bs = svdfile["beam_svd"][:]
-        else:
-            bs = svdfile["beam_svd"][fi][:]
-
-        svdfile.close()
+        return self._cached_svd_dataset(mi, "beam_svd", fi=fi)
 
-        return bs
-
-    @util.cache_last
     def invbeam_svd(self, mi, fi=None):
         """Fetch the SVD beam transfer matrix (S V^H) for a given m. This SVD beam
         transfer projects from the sky into the SVD basis.
@@ -466,19 +845,8 @@ class BeamTransfer(object):
         beam : np.ndarray (nfreq, svd_len, npol_sky, lmax+1)
         """
 
-        svdfile = h5py.File(self._svdfile(mi), "r")
+        return self._cached_svd_dataset(mi, "invbeam_svd", fi=fi)
 
-        # Required array shape depends on whether we are returning all frequency blocks or not.
-        if fi is None:
-            ibs = svdfile["invbeam_svd"][:]
-        else:
-            ibs = svdfile["invbeam_svd"][fi][:]
-
-        svdfile.close()
-
-        return ibs
-
-    @util.cache_last
     def beam_ut(self, mi, fi=None):
         """Fetch the SVD beam transfer matrix (U^H) for a given m. This SVD beam
         transfer projects from the telescope space into the SVD basis.
@@ -498,19 +866,74 @@ class BeamTransfer(object):
         beam : np.ndarray (nfreq, svd_len, ntel)
         """
 
-        svdfile = h5py.File(self._svdfile(mi), "r")
+        return self._cached_svd_dataset(mi, "beam_ut", fi=fi)
 
-        # Required array shape depends on whether we are returning all frequency blocks or not.
-        if fi is None:
-            bs = svdfile["beam_ut"][:]
-        else:
-            bs = svdfile["beam_ut"][fi][:]
+    def beam_svd_into(self, mi, out, fi=None):
+        """Read the SVD beam transfer matrix for a given m into an existing array.
 
-        svdfile.close()
+        Uncached version of :meth:`beam_svd` which avoids allocating a new
+        array for each call.
 
-        return bs
+        Parameters
+        ----------
+        mi : integer
+            m-mode to fetch.
+        out : np.ndarray
+            Array to read into. Must be C contiguous and of the correct shape
+            (see :meth:`beam_svd`).
+        fi : integer
+            frequency block to fetch. fi=None (default) returns all.
+
+        Returns
+        -------
+        out : np.ndarray
+        """
+        return self._load_svd_dataset(mi, "beam_svd", fi=fi, out=out)
+
+    def invbeam_svd_into(self, mi, out, fi=None):
+        """Read the inverse SVD beam transfer matrix into an existing array.
+
+        Uncached version of :meth:`invbeam_svd` which avoids allocating a new
+        array for each call.
+
+        Parameters
+        ----------
+        mi : integer
+            m-mode to fetch.
+        out : np.ndarray
+            Array to read into. Must be C contiguous and of the correct shape
+            (see :meth:`invbeam_svd`).
+        fi : integer
+            frequency block to fetch. fi=None (default) returns all.
+
+        Returns
+        -------
+        out : np.ndarray
+        """
+        return self._load_svd_dataset(mi, "invbeam_svd", fi=fi, out=out)
+
+    def beam_ut_into(self, mi, out, fi=None):
+        """Read the SVD beam transfer matrix (U^H) into an existing array.
+
+        Uncached version of :meth:`beam_ut` which avoids allocating a new array
+        for each call.
+
+        Parameters
+        ----------
+        mi : integer
+            m-mode to fetch.
+        out : np.ndarray
+            Array to read into. Must be C contiguous and of the correct shape
+            (see :meth:`beam_ut`).
+        fi : integer
+            frequency block to fetch. fi=None (default) returns all.
+
+        Returns
+        -------
+        out : np.ndarray
+        """
+        return self._load_svd_dataset(mi, "beam_ut", fi=fi, out=out)
 
-    @util.cache_last
     def beam_singularvalues(self, mi):
         """Fetch the vector of beam singular values for a given m.
 
@@ -524,11 +947,7 @@ class BeamTransfer(object):
         beam : np.ndarray (nfreq, svd_len)
         """
 
-        svdfile = h5py.File(self._svdfile(mi), "r")
-        sv = svdfile["singularvalues"][:]
-        svdfile.close()
-
-        return sv
+        return self._cached_svd_dataset(mi, "singularvalues")
 
     # ===================================================
 
@@ -558,8 +977,14 @@ class BeamTransfer(object):
         self._generate_mfiles(regen)
 
         if not skip_svd:
+            # Make sure no SVD files are held open while they are regenerated
+            self.clear_cache()
+
             self._generate_svdfiles(regen, skip_svd_inv)
 
+            # Forget anything loaded from any previous SVD files
+            self.clear_cache()
+
         # If we're part of an MPI run, synchronise here.
         mpiutil.barrier()
 
@@ -604,14 +1029,13 @@ class BeamTransfer(object):
             else:
                 print("f index %i. Creating file: %s" % (fi, (self._ffile(fi))))
 
-            f = h5py.File(self._ffile(fi), "w")
+            f = h5py.File(self._ffile(fi), "w", rdcc_nbytes=self._rdcc_nbytes)
 
             # Set a few useful attributes.
             # f.attrs['baselines'] = self.telescope.baselines
             # f.attrs['baseline_indices'] = np.arange(self.telescope.npairs)
             f.attrs["frequency_index"] = fi
             f.attrs["frequency"] = self.telescope.frequencies[fi]
-            f.attrs["cylobj"] = self._telescope_pickle
 
             dsize = (
                 self.telescope.nbase,
@@ -620,15 +1044,22 @@ class BeamTransfer(object):
                 2 * self.telescope.mmax + 1,
             )
 
+            # Chunk over baselines only, so that each chunk contains every m
             csize = (
-                min(10, self.telescope.nbase),
+                _chunk_rows(
+                    self.telescope.nbase, np.prod(dsize[1:]) * 16, self._chunk_max_bytes
+                ),
                 self.telescope.num_pol_sky,
                 self.telescope.lmax + 1,
-                1,
+                2 * self.telescope.mmax + 1,
             )
 
             dset = f.create_dataset(
-                "beam_freq", dsize, chunks=csize, compression="lzf", dtype=np.complex128
+                "beam_freq",
+                dsize,
+                chunks=csize,
+                dtype=np.complex128,
+                **self._compression_args
             )
 
             # Divide into roughly 5 GB chunks
@@ -653,12 +1084,15 @@ class BeamTransfer(object):
                 print("Calculating section %i of %i...." % (si, nsections))
                 b_ind, f_ind = b_sec[si], f_sec[si]
                 tarray = self.telescope.transfer_matrices(b_ind, f_ind)
-                dset[
-                    (b_ind[0]) : (b_ind[-1] + 1), ..., : (self.telescope.mmax + 1)
-                ] = tarray[..., : (self.telescope.mmax + 1)]
-                dset[
-                    (b_ind[0]) : (b_ind[-1] + 1), ..., (-self.telescope.mmax) :
-                ] = tarray[..., (-self.telescope.mmax) :]
+
+                # Pull out the positive and (wrapped around) negative m's we
+                # want so the section can be written in a single operation
+                nm = self.telescope.mmax + 1
+                tarray = np.concatenate(
+                    (tarray[..., :nm], tarray[..., (tarray.shape[-1] - nm + 1) :]),
+                    axis=-1,
+                )
+                dset[(b_ind[0]) : (b_ind[-1] + 1)] = tarray
                 del tarray
 
             f.close()
@@ -719,15 +1153,25 @@ class BeamTransfer(object):
                 self.telescope.num_pol_sky,
                 self.telescope.lmax + 1,
             )
+            # Chunk such that a frequency can be read in as few chunks as
+            # possible, only splitting the baseline axis to limit the size
             csize = (
                 1,
                 2,
-                min(10, self.telescope.nbase),
+                _chunk_rows(
+                    self.telescope.nbase,
+                    2 * np.prod(dsize[3:]) * 16,
+                    self._chunk_max_bytes,
+                ),
                 self.telescope.num_pol_sky,
                 self.telescope.lmax + 1,
             )
             f.create_dataset(
-                "beam_m", dsize, chunks=csize, compression="lzf", dtype=np.complex128
+                "beam_m",
+                dsize,
+                chunks=csize,
+                dtype=np.complex128,
+                **self._compression_args
             )
 
             # Write a few useful attributes.
@@ -739,8 +1183,31 @@ class BeamTransfer(object):
 
         mpiutil.barrier()
 
+        chunks = mpiutil.split_m(nfb, num_chunks).T
+
+        # Create array to hold the local matrix section. This is large so
+        # allocate it once, big enough for the largest chunk, and reuse it.
+        max_loc = max(mpiutil.split_local(fbnum)[0] for fbnum in chunks[:, 0])
+        fb_buf = np.empty(
+            (
+                max_loc,
+                2,
+                self.telescope.num_pol_sky,
+                self.telescope.lmax + 1,
+                self.telescope.mmax + 1,
+            ),
+            dtype=np.complex128,
+        )
+
+        # Open all the local m-files once for the whole calculation, rather than
+        # reopening each for every chunk
+        mfiles = [
+            h5py.File(self._mfile(mi), "r+", rdcc_nbytes=self._rdcc_nbytes)
+            for mi in range(sm, em)
+        ]
+
         # Iterate over chunks
-        for ci, fbrange in enumerate(mpiutil.split_m(nfb, num_chunks).T):
+        for ci, fbrange in enumerate(chunks):
 
             if mpiutil.rank0:
                 print("Starting chunk %i of %i" % (ci + 1, num_chunks))
@@ -756,29 +1223,23 @@ class BeamTransfer(object):
             f_ind = fbmap[0, fb_ind]
             bl_ind = fbmap[1, fb_ind]
 
-            # Create array to hold local matrix section
-            fb_array = np.zeros(
-                (
-                    loc_num,
-                    2,
-                    self.telescope.num_pol_sky,
-                    self.telescope.lmax + 1,
-                    self.telescope.mmax + 1,
-                ),
-                dtype=np.complex128,
-            )
+            fb_array = fb_buf[:loc_num]
 
             if loc_num > 0:
 
                 # Calculate the local Beam Matrices
                 tarray = self.telescope.transfer_matrices(bl_ind, f_ind)
 
-                # Expensive memory copy into array section
-                for mi in range(1, self.telescope.mmax + 1):
-                    fb_array[:, 0, ..., mi] = tarray[..., mi]
-                    fb_array[:, 1, ..., mi] = (-1) ** mi * tarray[..., -mi].conj()
+                # Expensive memory copy into array section. The negative m's
+                # are read in reverse so they line up with the positive ones.
+                mmax = self.telescope.mmax
+                signs = (-1) ** np.arange(1, mmax + 1)
 
-                fb_array[:, 0, ..., 0] = tarray[..., 0]
+                fb_array[:, 0, ..., : (mmax + 1)] = tarray[..., : (mmax + 1)]
+                fb_array[:, 1, ..., 0] = 0.0
+                fb_array[:, 1, ..., 1:] = (
+                    signs * tarray[..., -1 : -(mmax + 1) : -1].conj()
+                )
 
                 del tarray
 
@@ -797,22 +1258,40 @@ class BeamTransfer(object):
                 ),
             )
 
-            del fb_array
+            # The chunk is a contiguous range of the frequency-major list, so
+            # consists of a partial frequency at the start, a block of complete
+            # frequencies and a partial frequency at the end. Find these so each
+            # can be written out as a single slab.
+            nbase = self.telescope.nbase
+            fcut = [-(-fbstart // nbase) * nbase, (fbend // nbase) * nbase]
+            bounds = np.unique([fbstart] + fcut + [fbend])
+            bounds = bounds[(bounds >= fbstart) & (bounds <= fbend)]
 
             # Write out the current set of chunks into the m-files.
-            for lmi, mi in enumerate(range(sm, em)):
-
-                # Open up correct m-file
-                with h5py.File(self._mfile(mi), "r+") as mfile:
-
-                    # Lookup where to write Beam Transfers and write into file.
-                    for fbl, fbi in enumerate(range(fbstart, fbend)):
-                        fi = fbmap[0, fbi]
-                        bi = fbmap[1, fbi]
-                        mfile["beam_m"][fi, :, bi] = m_array[fbl, ..., lmi]
+            for lmi, mfile in enumerate(mfiles):
+
+                for fbs, fbe in zip(bounds[:-1], bounds[1:]):
+                    fb_sec = m_array[(fbs - fbstart) : (fbe - fbstart), ..., lmi]
+
+                    if fbs % nbase == 0 and fbe % nbase == 0:
+                        # Complete frequencies
+                        nf = (fbe - fbs) // nbase
+                        fb_sec = fb_sec.reshape((nf, nbase) + fb_sec.shape[1:])
+                        fs = fbs // nbase
+                        mfile["beam_m"][fs : (fs + nf)] = fb_sec.transpose(
+                            0, 2, 1, 3, 4
+                        )
+                    else:
+                        # Part of a single frequency
+                        fi, bs = divmod(fbs, nbase)
+                        be = bs + (fbe - fbs)
+                        mfile["beam_m"][fi, :, bs:be] = fb_sec.transpose(1, 0, 2, 3)
 
             del m_array
 
+        for mfile in mfiles:
+            mfile.close()
+
         mpiutil.barrier()
 
         et = time.time()
@@ -831,6 +1310,16 @@ class BeamTransfer(object):
         ## m, performing the SVD, combining the beams and then write out the
         ## results.
 
+        # Keep the singular values for the m's generated on this rank, so
+        # they don't need to be read back in to collect the spectrum
+        svd_spectrum = {}
+
+        # The rank of SVD1 found at each frequency for the last m, used as the
+        # initial guess for the randomized SVD. This is only updated once all
+        # the frequencies of an m are done, so that the guesses don't depend
+        # on the order in which the threads finish.
+        svd1_rank = np.ones(self.telescope.nfreq, dtype=int)
+
         # For each `m` collect all the `m` sections from each frequency file,
         # and write them into a new `m` file. Use MPI if available.
         for mi in mpiutil.mpirange(self.telescope.mmax + 1):
@@ -845,10 +1334,10 @@ class BeamTransfer(object):
                 print("m index %i. Creating SVD file: %s" % (mi, self._svdfile(mi)))
 
             # Open m beams for reading.
-            fm = h5py.File(self._mfile(mi), "r")
+            fm = h5py.File(self._mfile(mi), "r", rdcc_nbytes=self._rdcc_nbytes)
 
             # Open file to write SVD results into.
-            fs = h5py.File(self._svdfile(mi), "w")
+            fs = self._svdfile_h5(mi, "w")
 
             # Create a chunked dataset for writing the SVD beam matrix into.
             dsize_bsvd = (
@@ -857,18 +1346,12 @@ class BeamTransfer(object):
                 self.telescope.num_pol_sky,
                 self.telescope.lmax + 1,
             )
-            csize_bsvd = (
-                1,
-                min(10, self.svd_len),
-                self.telescope.num_pol_sky,
-                self.telescope.lmax + 1,
-            )
             dset_bsvd = fs.create_dataset(
                 "beam_svd",
                 dsize_bsvd,
-                chunks=csize_bsvd,
-                compression="lzf",
-                dtype=np.complex128,
+                chunks=self._svd_chunks["beam_svd"],
+                dtype=self._svd_dtype,
+                **self._compression_args
             )
 
             if not skip_svd_inv:
@@ -879,128 +1362,120 @@ class BeamTransfer(object):
                     self.telescope.lmax + 1,
                     self.svd_len,
                 )
-                csize_ibsvd = (
-                    1,
-                    self.telescope.num_pol_sky,
-                    self.telescope.lmax + 1,
-                    min(10, self.svd_len),
-                )
                 dset_ibsvd = fs.create_dataset(
                     "invbeam_svd",
                     dsize_ibsvd,
-                    chunks=csize_ibsvd,
-                    compression="lzf",
-                    dtype=np.complex128,
+                    chunks=self._svd_chunks["invbeam_svd"],
+                    dtype=self._svd_dtype,
+                    **self._compression_args
                 )
 
             # Create a chunked dataset for the stokes T U-matrix (left evecs)
             dsize_ut = (self.telescope.nfreq, self.svd_len, self.ntel)
-            csize_ut = (1, min(10, self.svd_len), self.ntel)
             dset_ut = fs.create_dataset(
                 "beam_ut",
                 dsize_ut,
-                chunks=csize_ut,
-                compression="lzf",
-                dtype=np.complex128,
+                chunks=self._svd_chunks["beam_ut"],
+                dtype=self._svd_dtype,
+                **self._compression_args
             )
 
             # Create a dataset for the singular values.
             dsize_sig = (self.telescope.nfreq, self.svd_len)
             dset_sig = fs.create_dataset("singularvalues", dsize_sig, dtype=np.float64)
 
-            ## For each frequency in the m-files read in the block, SVD it,
-            ## and construct the new beam matrix, and save.
-            for fi in np.arange(self.telescope.nfreq):
-
-                # Read the positive and negative m beams, and combine into one.
-                bf = fm["beam_m"][fi][:].reshape(
-                    self.ntel, self.telescope.num_pol_sky, self.telescope.lmax + 1
+            # Read the positive and negative m beams for each frequency
+            # directly into a new buffer (which is prewhitened in place by
+            # `_svd_freq`). The next frequency is read in a background thread
+            # while the current one is being decomposed.
+            dset_m = fm["beam_m"]
+
+            def _read_block(fi):
+                bf = np.empty(dset_m.shape[1:], dtype=dset_m.dtype)
+                dset_m.read_direct(bf, source_sel=np.s_[fi])
+                return fi, bf
+
+            # Collect the results for all frequencies in memory, so each
+            # dataset can be written out in a single operation at the end.
+            # Frequencies (or modes) without results are left as zero. The
+            # beams are kept in double precision as the inverse is calculated
+            # from them.
+            buf_ut = np.zeros(dsize_ut, dtype=self._svd_dtype)
+            buf_bsvd = np.zeros(dsize_bsvd, dtype=np.complex128)
+            buf_sig = np.zeros(dsize_sig, dtype=np.float64)
+
+            # The SVD of each frequency writes its U^H matrix and beam straight
+            # into the buffers
+            def _svd_block(block):
+                fi, bf = block
+                beam_out = buf_bsvd[fi].reshape(self.svd_len, self.nsky)
+                return self._svd_freq(
+                    mi, fi, bf, buf_ut[fi], beam_out, rank_hint=svd1_rank[fi]
                 )
 
-                noisew = self.telescope.noisepower(
-                    np.arange(self.telescope.npairs), fi
-                ).flatten() ** (-0.5)
-                noisew = np.concatenate([noisew, noisew])
-                bf = bf * noisew[:, np.newaxis, np.newaxis]
-
-                # Reshape total beam to a 2D matrix
-                bfr = bf.reshape(self.ntel, -1)
-
-                # If unpolarised skip straight to the final SVD, otherwise
-                # project onto the polarised null space.
-                if self.telescope.num_pol_sky == 1:
-                    bf2 = bfr
-                    ut2 = np.identity(self.ntel, dtype=np.complex128)
+            ## For each frequency in the m-files read in the block, SVD it,
+            ## and construct the new beam matrix. The frequencies are
+            ## independent so may be processed by several threads.
+            blocks = util.prefetch_map(_read_block, range(self.telescope.nfreq))
+            freq_iter = util.threaded_map(_svd_block, blocks, self.svd_threads)
+            # Track the largest number of modes at any frequency
+            nmax = 0
+            m_rank = svd1_rank.copy()
+            # Track whether the final SVD at each frequency was exact
+            svd_exact = np.ones(self.nfreq, dtype=bool)
+
+            for fi, (sig, rank1, exact) in enumerate(freq_iter):
+
+                m_rank[fi] = rank1
+                svd_exact[fi] = exact
+
+                # Skip if there were no modes for some reason.
+                if sig is None:
+                    continue
+
+                # The singular values for each block
+                nmax = max(nmax, sig.shape[0])
+                buf_sig[fi, : sig.shape[0]] = sig
+
+            svd1_rank = m_rank
+
+            # Save everything to disk. Only the modes up to the largest number
+            # at any frequency need to be written, beyond that the datasets are
+            # all zero. This relies on HDF5's default fill value of zero, which
+            # it returns for chunks never written, and is part of the file
+            # format.
+            dset_sig[:] = buf_sig
+            svd_spectrum[mi] = buf_sig
+
+            if nmax > 0:
+                dset_ut[:, :nmax] = buf_ut[:, :nmax]
+                dset_bsvd[:, :nmax] = buf_bsvd[:, :nmax]
+
+            if not skip_svd_inv and nmax > 0:
+                bsvd = buf_bsvd.reshape(self.nfreq, self.svd_len, self.nsky)[:, :nmax]
+                sig = buf_sig[:, :nmax]
+
+                if self.telescope.num_pol_sky == 1 and svd_exact.all():
+                    # Without polarisation the SVD beam is simply diag(sig) V^H,
+                    # so its pseudo-inverse is V diag(1/sig) = B^H diag(1/sig^2)
+                    # and there's no need for another SVD. Cut small singular
+                    # values in the same way as a pseudo-inverse would. This
+                    # only holds if the SVD was exact, and not found with the
+                    # Gram matrix method or a QR fallback.
+                    cutoff = np.finfo(sig.dtype).eps * self.nsky * sig[:, :1]
+                    sinv2 = np.zeros_like(sig)
+                    np.divide(1.0, sig ** 2, out=sinv2, where=(sig > cutoff))
+
+                    ibsvd = np.swapaxes(bsvd, 1, 2).conj() * sinv2[:, np.newaxis, :]
                 else:
-                    ## SVD 1 - coarse projection onto sky-modes
-                    u1, s1 = matrix_image(
-                        bfr, rtol=1e-10, errmsg=("SVD1 m=%i f=%i" % (mi, fi))
-                    )
-
-                    ut1 = u1.T.conj()
-                    bf1 = np.dot(ut1, bfr)
-
-                    ## SVD 2 - project onto polarisation null space
-                    bfp = bf1.reshape(
-                        bf1.shape[0],
-                        self.telescope.num_pol_sky,
-                        self.telescope.lmax + 1,
-                    )[:, 1:]
-                    bfp = bfp.reshape(
-                        bf1.shape[0],
-                        (self.telescope.num_pol_sky - 1) * (self.telescope.lmax + 1),
-                    )
-                    u2, s2 = matrix_nullspace(
-                        bfp, rtol=self.polsvcut, errmsg=("SVD2 m=%i f=%i" % (mi, fi))
-                    )
-
-                    ut2 = np.dot(u2.T.conj(), ut1)
-                    bf2 = np.dot(ut2, bfr)
-
-                # Check to ensure polcut hasn't thrown away all modes. If it
-                # has, just leave datasets blank.
-                if bf2.shape[0] > 0 and (
-                    self.telescope.num_pol_sky == 1 or (s1 > 0.0).any()
-                ):
-
-                    ## SVD 3 - decompose polarisation null space
-                    bft = bf2.reshape(
-                        -1, self.telescope.num_pol_sky, self.telescope.lmax + 1
-                    )[:, 0]
-
-                    u3, s3 = matrix_image(
-                        bft, rtol=0.0, errmsg=("SVD3 m=%i f=%i" % (mi, fi))
-                    )
-                    ut3 = np.dot(u3.T.conj(), ut2)
-
-                    nmodes = ut3.shape[0]
-
-                    # Skip if nmodes is zero for some reason.
-                    if nmodes == 0:
-                        continue
-
-                    # Final products
-                    ut = ut3
-                    sig = s3[:nmodes]
-                    beam = np.dot(ut3, bfr)
-
-                    # Save out the evecs (for transforming from the telescope frame into the SVD basis)
-                    dset_ut[fi, :nmodes] = ut * noisew[np.newaxis, :]
-
-                    # Save out the modified beam matrix (for mapping from the sky into the SVD basis)
-                    dset_bsvd[fi, :nmodes] = beam.reshape(
-                        nmodes, self.telescope.num_pol_sky, self.telescope.lmax + 1
-                    )
-
-                    if not skip_svd_inv:
-                        ibeam = la.pinv(beam)
-                        # Find the pseudo-inverse of the beam matrix and save to disk.
-                        dset_ibsvd[fi, :, :, :nmodes] = ibeam.reshape(
-                            self.telescope.num_pol_sky, self.telescope.lmax + 1, nmodes
-                        )
+                    # Find the pseudo-inverse of the beam matrices for all
+                    # frequencies in one batched call. The padding of the beams
+                    # with zero rows beyond the number of modes at each
+                    # frequency just gives zero columns in the inverse, which is
+                    # what we want.
+                    ibsvd = blockla.pinv_dm(bsvd)
 
-                    # Save out the singular values for each block
-                    dset_sig[fi, :nmodes] = sig
+                dset_ibsvd[..., :nmax] = ibsvd.reshape(dsize_ibsvd[:-1] + (nmax,))
 
             # Write a few useful attributes.
             fs.attrs["baselines"] = self.telescope.baselines
@@ -1010,27 +1485,195 @@ class BeamTransfer(object):
             fs.close()
             fm.close()
 
-        # If we're part of an MPI run, synchronise here.
-        mpiutil.barrier()
+        # Collect the spectrum into a single file. There's no need to
+        # synchronise first, as the gather within this provides that.
+        self._collect_svd_spectrum(svd_spectrum)
+
+    def _generate_svdfiles_by_m(self, regen=False, skip_svd_inv=False):
+        ## Generate the SVD files for the subclasses that process all the
+        ## frequencies of an m at once (in `_generate_svdfile_m`). The m's on
+        ## each rank are independent so may be processed by several threads.
+
+        # Find the m's on this rank whose files need to be generated
+        mlist = []
+        for mi in mpiutil.mpirange(self.telescope.mmax + 1):
+
+            if os.path.exists(self._svdfile(mi)) and not regen:
+                print(
+                    "m index %i. File: %s exists. Skipping..."
+                    % (mi, (self._svdfile(mi)))
+                )
+            else:
+                mlist.append(mi)
+
+        def _svd_m(mi):
+            print("m index %i. Creating SVD file: %s" % (mi, self._svdfile(mi)))
+            return self._generate_svdfile_m(mi, skip_svd_inv=skip_svd_inv)
+
+        # Keep the singular values for the m's generated on this rank, so
+        # they don't need to be read back in to collect the spectrum
+        m_iter = util.threaded_map(_svd_m, mlist, self.svd_threads)
+        svd_spectrum = dict(zip(mlist, m_iter))
+
+        # Collect the spectrum into a single file. There's no need to
+        # synchronise first, as the gather within this provides that.
+        self._collect_svd_spectrum(svd_spectrum)
+
+    def _load_weighted_beam_m(self, fm):
+        ## Read the beam transfer matrices for all frequencies from the open
+        ## m-file `fm`, and apply the noise weighting. Returns the weighted
+        ## beams packed as (nfreq, ntel, npol, lmax+1) and the weights.
+
+        bf = fm["beam_m"][:].reshape(
+            self.nfreq, self.ntel, self.telescope.num_pol_sky, self.telescope.lmax + 1
+        )
+
+        noisew = self._noise_weight()
+        bf *= noisew[:, :, np.newaxis, np.newaxis]
+
+        return bf, noisew
+
+    def _svd_freq(self, mi, fi, bf, ut_out, beam_out, rank_hint=1):
+        ## Perform the SVDs for a single frequency block `bf` of the beam
+        ## transfer matrix at `mi`. The noise weighted U^H matrix and the SVD
+        ## beam are written into the first rows of `ut_out` and `beam_out`
+        ## (packed as [svd_len, ntel] and [svd_len, nsky]). Returns the
+        ## singular values (or None if there are no modes), the rank found by
+        ## SVD1, which `rank_hint` guesses for the randomized SVD, and whether
+        ## the final SVD is exact, such that the SVD beam is diag(sig) V^H.
+        ## Note that `bf` is prewhitened in place.
+
+        noisew = self._noise_weight(fi)
+
+        # Reshape total beam to a 2D matrix and apply the noise weighting
+        bfr = bf.reshape(self.ntel, -1)
+        bfr *= noisew[:, np.newaxis]
+
+        # If unpolarised skip straight to the final SVD, otherwise
+        # project onto the polarised null space.
+        if self.telescope.num_pol_sky == 1:
+            # No projection, so avoid multiplying through by an identity matrix
+            bft = bfr
+            ut2 = None
+        else:
+            ## SVD 1 - coarse projection onto sky-modes
+            errmsg = "SVD1 m=%i f=%i" % (mi, fi)
+            if self.svd_randomized:
+                # Use the rank found at this frequency for the last m as a guess
+                u1, s1 = matrix_image_randomized(
+                    bfr, rank_hint, rtol=1e-10, errmsg=errmsg
+                )
+            else:
+                u1, s1 = matrix_image(bfr, rtol=1e-10, errmsg=errmsg)
+
+            rank_hint = u1.shape[1]
+
+            ut1 = u1.T.conj()
+            bf1 = np.dot(ut1, bfr)
+
+            ## SVD 2 - project onto polarisation null space
+            bfp = bf1.reshape(
+                bf1.shape[0], self.telescope.num_pol_sky, self.telescope.lmax + 1
+            )[:, 1:]
+            bfp = bfp.reshape(
+                bf1.shape[0],
+                (self.telescope.num_pol_sky - 1) * (self.telescope.lmax + 1),
+            )
+            u2, s2 = matrix_nullspace(
+                bfp, rtol=self.polsvcut, errmsg=("SVD2 m=%i f=%i" % (mi, fi))
+            )
+
+            ut2 = np.dot(u2.T.conj(), ut1)
+
+            # Only the T part of the projected beam is needed for SVD3, so
+            # calculate just that, from the already reduced beam
+            bf1t = bf1.reshape(
+                bf1.shape[0], self.telescope.num_pol_sky, self.telescope.lmax + 1
+            )[:, 0]
+            bft = np.dot(u2.T.conj(), bf1t)
+
+        # Check to ensure polcut hasn't thrown away all modes. If it
+        # has, just leave datasets blank.
+        if not (
+            bft.shape[0] > 0 and (self.telescope.num_pol_sky == 1 or (s1 > 0.0).any())
+        ):
+            return None, rank_hint, True
+
+        ## SVD 3 - decompose polarisation null space
+        u3, s3, exact = matrix_image(
+            bft,
+            rtol=0.0,
+            errmsg=("SVD3 m=%i f=%i" % (mi, fi)),
+            gram=self.svd_gram,
+            full_output=True,
+        )
+        ut3 = u3.T.conj() if ut2 is None else np.dot(u3.T.conj(), ut2)
+
+        nmodes = ut3.shape[0]
+
+        # Skip if nmodes is zero for some reason.
+        if nmodes == 0:
+            return None, rank_hint, True
+
+        # Final products, written directly into the output arrays
+        np.multiply(ut3, noisew[np.newaxis, :], out=ut_out[:nmodes])
+        np.dot(ut3, bfr, out=beam_out[:nmodes])
+
+        return s3[:nmodes], rank_hint, exact
+
+    def _collect_svd_spectrum(self, svd_spectrum=None):
+        """Gather the SVD spectrum into a single file.
+
+        Parameters
+        ----------
+        svd_spectrum : dict, optional
+            Singular values already in memory on this rank, keyed by `m`.
+            Those for any other `m` are read in from the SVD files.
+        """
+
+        if svd_spectrum is None:
+            svd_spectrum = {}
+
+        def svd_func(mi):
+            if mi in svd_spectrum:
+                return svd_spectrum[mi]
+            return self.beam_singularvalues(mi)
+
+        mlist = list(range(self.telescope.mmax + 1))
+        fname = self.directory + "/svdspectrum.hdf5"
+
+        # The m's are distributed across ranks in the same way as when
+        # generating the files. So any spectrum not held in memory comes from
+        # a file which already existed, and can be read without waiting for
+        # the other ranks.
+
+        # If h5py has been built with MPI support, each rank writes its own
+        # m's directly, saving gathering the whole spectrum onto rank 0
+        if mpiutil.size > 1 and h5py.get_config().mpi:
+
+            with h5py.File(fname, "w", driver="mpio", comm=mpiutil.world) as f:
 
-        # Collect the spectrum into a single file.
-        self._collect_svd_spectrum()
+                dset = f.create_dataset(
+                    "singularvalues",
+                    shape=(len(mlist), self.nfreq, self.svd_len),
+                    dtype=np.float64,
+                )
 
-    def _collect_svd_spectrum(self):
-        """Gather the SVD spectrum into a single file."""
+                for mi in mpiutil.partition_list_mpi(mlist):
+                    sv = svd_func(mi)
+                    if sv is not None:
+                        dset[mi] = sv
 
-        svd_func = lambda mi: self.beam_singularvalues(mi)
+            mpiutil.barrier()
+            return
 
         svdspectrum = kltransform.collect_m_array(
-            list(range(self.telescope.mmax + 1)),
-            svd_func,
-            (self.nfreq, self.svd_len),
-            np.float64,
+            mlist, svd_func, (self.nfreq, self.svd_len), np.float64
         )
 
         if mpiutil.rank0:
 
-            with h5py.File(self.directory + "/svdspectrum.hdf5", "w") as f:
+            with h5py.File(fname, "w") as f:
 
                 f.create_dataset("singularvalues", data=svdspectrum)
 
@@ -1073,15 +1716,11 @@ class BeamTransfer(object):
             Telescope vector to return.
         """
 
-        vecf = np.zeros((self.nfreq, self.ntel), dtype=np.complex128)
-
-        with h5py.File(self._mfile(mi), "r") as mfile:
-
-            for fi in range(self.nfreq):
-                beamf = mfile["beam_m"][fi][:].reshape((self.ntel, self.nsky))
-                vecf[fi] = np.dot(beamf, vec[fi].reshape(self.nsky))
+        # Read the beams for all frequencies in one go and project them together
+        beam = self.beam_m(mi).reshape((self.nfreq, self.ntel, self.nsky))
+        vec = vec.reshape((self.nfreq, self.nsky, 1))
 
-        return vecf
+        return np.matmul(beam, vec)[..., 0]
 
     project_vector_forward = project_vector_sky_to_telescope
 
@@ -1104,11 +1743,9 @@ class BeamTransfer(object):
 
         ibeam = self.invbeam_m(mi).reshape((self.nfreq, self.nsky, self.ntel))
 
-        vecb = np.zeros((self.nfreq, self.nsky), dtype=np.complex128)
-        vec = vec.reshape((self.nfreq, self.ntel))
+        vec = vec.reshape((self.nfreq, self.ntel, 1))
 
-        for fi in range(self.nfreq):
-            vecb[fi] = np.dot(ibeam[fi], vec[fi, :].reshape(self.ntel))
+        vecb = np.matmul(ibeam, vec)
 
         return vecb.reshape(
             (self.nfreq, self.telescope.num_pol_sky, self.telescope.lmax + 1)
@@ -1118,19 +1755,19 @@ class BeamTransfer(object):
 
     def project_vector_backward_dirty(self, mi, vec):
 
-        dbeam = self.beam_m(mi).reshape((self.nfreq, self.ntel, self.nsky))
-        dbeam = dbeam.transpose((0, 2, 1)).conj()
+        beam = self.beam_m(mi).reshape((self.nfreq, self.ntel, self.nsky))
+        dbeam = beam.transpose((0, 2, 1)).conj()
 
-        vecb = np.zeros((self.nfreq, self.nsky), dtype=np.complex128)
         vec = vec.reshape((self.nfreq, self.ntel))
 
-        for fi in range(self.nfreq):
-            norm = np.dot(dbeam[fi].T.conj(), dbeam[fi]).diagonal()
-            norm = np.where(norm < 1e-6, 0.0, 1.0 / norm)
-            # norm = np.dot(dbeam[fi], dbeam[fi].T.conj()).diagonal()
-            # norm = np.where(np.logical_or(np.abs(norm) < 1e-4,
-            # np.abs(norm) < np.abs(norm.max()*1e-2)), 0.0, 1.0 / norm)
-            vecb[fi] = np.dot(dbeam[fi], vec[fi, :].reshape(self.ntel) * norm)
+        # Normalise by the total response of each telescope element. This is the
+        # diagonal of B^H B, so just calculate it directly rather than forming
+        # the full matrix.
+        norm = np.einsum("fjk,fjk->fj", beam.conj(), beam).real
+        inorm = np.zeros_like(norm)
+        np.divide(1.0, norm, out=inorm, where=(norm >= 1e-6))
+
+        vecb = np.matmul(dbeam, (vec * inorm)[..., np.newaxis])[..., 0]
 
         return vecb.reshape(
             (self.nfreq, self.telescope.num_pol_sky, self.telescope.lmax + 1)
@@ -1156,19 +1793,28 @@ class BeamTransfer(object):
 
         beam = self.beam_m(mi).reshape((self.nfreq, self.ntel, npol, lside))
 
-        matf = np.zeros(
+        # Every row of the output is written below so no need to initialise it
+        matf = np.empty(
             (self.nfreq, self.ntel, self.nfreq, self.ntel), dtype=np.complex128
         )
 
-        # Should it be a +=?
-        for pi in range(npol):
-            for pj in range(npol):
-                for fi in range(self.nfreq):
-                    for fj in range(self.nfreq):
-                        matf[fi, :, fj, :] += np.dot(
-                            (beam[fi, :, pi, :] * mat[pi, pj, :, fi, fj]),
-                            beam[fj, :, pj, :].T.conj(),
-                        )
+        beamc = beam.conj()
+
+        # Buffer for the sky covariance applied to the beams, reused for every
+        # frequency rather than allocating a new temporary each time
+        cb = np.empty((npol, lside, self.nfreq, self.ntel), dtype=np.complex128)
+
+        # For each frequency, first apply the sky covariance to the beams at
+        # all other frequencies. The sum over polarisations and l is then a
+        # single matrix product with the beam at this frequency, which is
+        # written straight into the output.
+        for fi in range(self.nfreq):
+            np.einsum("pqlg,gjql->plgj", mat[:npol, :npol, :, fi], beamc, out=cb)
+            np.dot(
+                beam[fi].reshape(self.ntel, npol * lside),
+                cb.reshape(npol * lside, self.nfreq * self.ntel),
+                out=matf[fi].reshape(self.ntel, self.nfreq * self.ntel),
+            )
 
         return matf
 
@@ -1176,22 +1822,65 @@ class BeamTransfer(object):
 
     def _svd_num(self, mi):
         ## Calculate the number of SVD modes meeting the cut for each
-        ## frequency, return the number and the array bounds
+        ## frequency, return the number and the array bounds. These are needed
+        ## several times by each projection, so cache them for each m (and
+        ## value of the cut).
+
+        key = (mi, self.svcut)
 
-        # Get the array of singular values for each mode
-        sv = self.beam_singularvalues(mi)
+        if key not in self._svd_num_cache:
 
-        # Number of significant sv modes at each frequency
-        svnum = (sv > sv.max() * self.svcut).sum(axis=1)
+            # Get the array of singular values for each mode
+            sv = self.beam_singularvalues(mi)
 
-        # Calculate the block bounds within the full matrix
-        svbounds = np.cumsum(np.insert(svnum, 0, 0))
+            # Number of significant sv modes at each frequency
+            svnum = (sv > sv.max() * self.svcut).sum(axis=1)
 
-        return svnum, svbounds
+            # Calculate the block bounds within the full matrix
+            svbounds = np.cumsum(np.insert(svnum, 0, 0))
+
+            # The frequencies with any modes
+            svfreq = np.flatnonzero(svnum)
+
+            # Mask selecting the significant modes from the arrays of all modes
+            # at each frequency
+            svmask = np.arange(sv.shape[1])[np.newaxis, :] < svnum[:, np.newaxis]
+
+            for arr in (svnum, svbounds, svfreq, svmask):
+                arr.flags.writeable = False
+
+            # The slice of the full matrix for each frequency
+            svslices = tuple(
+                slice(svbounds[fi], svbounds[fi + 1]) for fi in range(len(svnum))
+            )
+
+            self._svd_num_cache[key] = (svnum, svbounds, svfreq, svmask, svslices)
+
+        return self._svd_num_cache[key][:2]
 
     def _svd_freq_iter(self, mi):
-        num = self._svd_num(mi)[0]
-        return [fi for fi in range(self.nfreq) if (num[fi] > 0)]
+        self._svd_num(mi)
+        return self._svd_num_cache[(mi, self.svcut)][2]
+
+    def _svd_mask(self, mi):
+        ## Boolean mask of shape (nfreq, svd_len) picking out the significant
+        ## modes. Indexing an array packed by frequency and mode with this gives
+        ## the modes in the same order as the SVD vectors.
+        self._svd_num(mi)
+        return self._svd_num_cache[(mi, self.svcut)][3]
+
+    def _svd_slices(self, mi):
+        ## The slice of the SVD basis occupied by the modes at each frequency
+        self._svd_num(mi)
+        return self._svd_num_cache[(mi, self.svcut)][4]
+
+    def _svd_unpack(self, mi, svec):
+        ## Unpack a vector (or stack of vectors) in the SVD basis into an array
+        ## of shape (nfreq, svd_len, ...), with the insignificant modes zero.
+        svmask = self._svd_mask(mi)
+        svecp = np.zeros(svmask.shape + svec.shape[1:], dtype=np.complex128)
+        svecp[svmask] = svec
+        return svecp
 
     def project_matrix_sky_to_svd(self, mi, mat, temponly=False):
         """Project a covariance matrix from the sky into the SVD basis.
@@ -1221,31 +1910,53 @@ class BeamTransfer(object):
 
         # Number of significant sv modes at each frequency, and the array bounds
         svnum, svbounds = self._svd_num(mi)
+        svslices = self._svd_slices(mi)
+
+        # Create the output matrix. Every block of rows is written below, so
+        # there is no need to initialise it
+        matf = np.empty((svbounds[-1], svbounds[-1]), dtype=np.complex128)
+
+        # Pack the significant modes at all frequencies into a single beam
+        # matrix, ordered as in the output, and find the frequency of each mode
+        svbeam = beam[:, :, :npol][self._svd_mask(mi)]
+        svfreq = np.repeat(np.arange(self.nfreq), svnum)
+
+        # Process the columns of the output in blocks of modes, so the buffers
+        # below are of bounded size however many modes there are in total
+        nsvd = svbounds[-1]
+        nblock = self._proj_block_bytes // (npol * npol * lside * mat.itemsize)
+        nblock = int(max(min(nblock, nsvd), 1))
+
+        # Flat buffers for the sky covariance at the frequency of each mode in
+        # the block, the conjugate beams of the block, and the covariance
+        # applied to them, reused for every block and frequency
+        lbuf = np.empty(npol * npol * lside * nblock, dtype=mat.dtype)
+        bcbuf = np.empty(nblock * npol * lside, dtype=svbeam.dtype)
+        cbbuf = np.empty(npol * lside * nblock, dtype=np.complex128)
+
+        for j0 in range(0, nsvd, nblock):
+            j1 = min(j0 + nblock, nsvd)
+            nj = j1 - j0
+
+            lmat = lbuf[: npol * npol * lside * nj].reshape(npol, npol, lside, nj)
+            bc = bcbuf[: nj * npol * lside].reshape(nj, npol, lside)
+            cb = cbbuf[: npol * lside * nj].reshape(npol, lside, nj)
+
+            np.conj(svbeam[j0:j1], out=bc)
+
+            # For each frequency apply the sky covariance to the beams of the
+            # modes in the block, the sum over polarisations and l is then a
+            # single matrix product with the beam at this frequency, giving
+            # the block of the output for this frequency's rows.
+            for fi in self._svd_freq_iter(mi):
+                np.take(mat[:npol, :npol, :, fi], svfreq[j0:j1], axis=-1, out=lmat)
+                np.einsum("pqlj,jql->plj", lmat, bc, out=cb)
 
-        # Create the output matrix
-        matf = np.zeros((svbounds[-1], svbounds[-1]), dtype=np.complex128)
-
-        # Should it be a +=?
-        for pi in range(npol):
-            for pj in range(npol):
-                for fi in self._svd_freq_iter(mi):
-
-                    fibeam = beam[
-                        fi, : svnum[fi], pi, :
-                    ]  # Beam for this pol, freq, and svcut (i)
-
-                    for fj in self._svd_freq_iter(mi):
-                        fjbeam = beam[
-                            fj, : svnum[fj], pj, :
-                        ]  # Beam for this pol, freq, and svcut (j)
-                        lmat = mat[
-                            pi, pj, :, fi, fj
-                        ]  # Local section of the sky matrix (i.e C_l part)
-
-                        matf[
-                            svbounds[fi] : svbounds[fi + 1],
-                            svbounds[fj] : svbounds[fj + 1],
-                        ] += np.dot(fibeam * lmat, fjbeam.T.conj())
+                fsl = svslices[fi]
+                matf[fsl, j0:j1] = np.dot(
+                    svbeam[fsl].reshape(svnum[fi], npol * lside),
+                    cb.reshape(npol * lside, nj),
+                )
 
         return matf
 
@@ -1268,31 +1979,58 @@ class BeamTransfer(object):
             Covariance in SVD basis.
         """
 
-        svdfile = h5py.File(self._svdfile(mi), "r")
-
-        # Get the SVD beam matrix
-        beam = svdfile["beam_ut"]
+        # Get the SVD beam matrix. Read it all at once, rather than a frequency
+        # at a time within the loop.
+        beam = self.beam_ut(mi)
 
         # Number of significant sv modes at each frequency, and the array bounds
         svnum, svbounds = self._svd_num(mi)
+        svslices = self._svd_slices(mi)
 
         # Create the output matrix
         matf = np.zeros((svbounds[-1], svbounds[-1]), dtype=np.complex128)
 
+        # Use the BLAS gemm directly so the conjugate transpose of the beam is
+        # applied within the product rather than being formed explicitly
+        gemm = la.get_blas_funcs("gemm", (beam, dmat))
+
+        # Buffer for the beam scaled by the matrix, reused for every frequency
+        sbeam = np.empty(beam.shape[1:], dtype=gemm.dtype)
+
         # Should it be a +=?
         for fi in self._svd_freq_iter(mi):
 
             fbeam = beam[fi, : svnum[fi], :]  # Beam matrix for this frequency and cut
             lmat = dmat[fi, :]  # Matrix section for this frequency
 
-            matf[
-                svbounds[fi] : svbounds[fi + 1], svbounds[fi] : svbounds[fi + 1]
-            ] = np.dot((fbeam * lmat), fbeam.T.conj())
+            fsbeam = np.multiply(fbeam, lmat, out=sbeam[: svnum[fi]])
 
-        svdfile.close()
+            fsl = svslices[fi]
+            matf[fsl, fsl] = gemm(1.0, fsbeam, fbeam, trans_b=2)
 
         return matf
 
+    def project_matrix_diagonal_telescope_to_svd_sparse(self, mi, dmat):
+        """Project a diagonal matrix into the SVD basis, sparse if possible.
+
+        As :meth:`project_matrix_diagonal_telescope_to_svd`, but if the
+        projected matrix is still diagonal it may be returned as a sparse
+        matrix, avoiding allocating the full dense matrix.
+
+        Parameters
+        ----------
+        mi : integer
+            Mode index to fetch for.
+        dmat : np.ndarray
+            Diagonal of the matrix packed as [nfreq, ntel]
+
+        Returns
+        -------
+        tmat : np.ndarray or scipy.sparse.spmatrix [nsvd, nsvd]
+            Covariance in SVD basis.
+        """
+        return self.project_matrix_diagonal_telescope_to_svd(mi, dmat)
+
     def project_vector_telescope_to_svd(self, mi, vec):
         """Map a vector from the telescope space into the SVD basis.
 
@@ -1318,18 +2056,12 @@ class BeamTransfer(object):
         # Get the SVD beam matrix
         beam = self.beam_ut(mi)
 
-        # Create the output matrix (shape is calculated from input shape)
-        vecf = np.zeros((svbounds[-1],) + vec.shape[2:], dtype=np.complex128)
-
-        # Should it be a +=?
-        for fi in self._svd_freq_iter(mi):
-
-            fbeam = beam[fi, : svnum[fi], :]  # Beam matrix for this frequency and cut
-            lvec = vec[fi, :]  # Matrix section for this frequency
-
-            vecf[svbounds[fi] : svbounds[fi + 1]] = np.dot(fbeam, lvec)
+        # Project all frequencies at once, and then pick out the significant
+        # modes (output shape is calculated from input shape)
+        lvec = vec.reshape(self.nfreq, self.ntel, -1)
+        vecf = np.matmul(beam, lvec)[self._svd_mask(mi)]
 
-        return vecf
+        return vecf.reshape((svbounds[-1],) + vec.shape[2:])
 
     def project_vector_svd_to_telescope(self, mi, svec):
         """Map a vector from the SVD basis into the original data basis.
@@ -1357,26 +2089,19 @@ class BeamTransfer(object):
         # Get the SVD beam matrix
         beam = self.beam_ut(mi)
 
-        # Create the output matrix (shape is calculated from input shape)
-        vecf = np.zeros((self.nfreq, self.ntel), dtype=np.complex128)
-
-        # Should it be a +=?
-        for fi in self._svd_freq_iter(mi):
-
-            noise = self.telescope.noisepower(
-                np.arange(self.telescope.npairs), fi
-            ).flatten()
-            noise = np.concatenate([noise, noise])
+        # The noise power at all frequencies
+        noise = self.noise_power()
 
-            fbeam = beam[fi, : svnum[fi], :]  # Beam matrix for this frequency and cut
-            lvec = svec[
-                svbounds[fi] : svbounds[fi + 1]
-            ]  # Matrix section for this frequency
+        # Unpack into an array of all modes at each frequency (with the
+        # insignificant ones zero) so we can project all frequencies at once.
+        lvec = self._svd_unpack(mi, svec)
 
-            # As the form of the forward projection is simply a scaling and then
-            # projection onto an orthonormal basis, the pseudo-inverse is simply
-            # related.
-            vecf[fi, :] = noise * np.dot(fbeam.T.conj(), lvec)
+        # As the form of the forward projection is simply a scaling and then
+        # projection onto an orthonormal basis, the pseudo-inverse is simply
+        # related. Apply the conjugate transpose of the beam by conjugating the
+        # (much smaller) vectors instead, to avoid copying the whole beam.
+        vecf = np.matmul(lvec.conj()[:, np.newaxis, :], beam)[:, 0]
+        vecf = noise * vecf.conj()
 
         return vecf.reshape(self.nfreq, 2, self.telescope.npairs)
 
@@ -1405,20 +2130,14 @@ class BeamTransfer(object):
         # Get the SVD beam matrix
         beam = self.beam_svd(mi)
 
-        # Create the output matrix
-        vecf = np.zeros((svbounds[-1],) + vec.shape[3:], dtype=np.complex128)
-
-        for pi in range(npol):
-            for fi in self._svd_freq_iter(mi):
-
-                fbeam = beam[
-                    fi, : svnum[fi], pi, :
-                ]  # Beam matrix for this frequency and cut
-                lvec = vec[fi, pi]  # Matrix section for this frequency
-
-                vecf[svbounds[fi] : svbounds[fi + 1]] += np.dot(fbeam, lvec)
+        # Project all frequencies at once, summing over the polarisations and
+        # l, and then pick out the significant modes
+        lside = self.telescope.lmax + 1
+        fbeam = beam[:, :, :npol].reshape(self.nfreq, -1, npol * lside)
+        lvec = vec[:, :npol].reshape(self.nfreq, npol * lside, -1)
+        vecf = np.matmul(fbeam, lvec)[self._svd_mask(mi)]
 
-        return vecf
+        return vecf.reshape((svbounds[-1],) + vec.shape[3:])
 
     def project_vector_svd_to_sky(self, mi, vec, temponly=False, conj=False):
         """Project a vector from the the sky into the SVD basis.
@@ -1441,11 +2160,6 @@ class BeamTransfer(object):
             SVD vector to return.
         """
         npol = 1 if temponly else self.telescope.num_pol_sky
-        print("temponly", temponly)
-        print("npol", npol)
-
-        # if not conj:
-        #     raise Exception("Not implemented non conj yet.")
 
         # Number of significant sv modes at each frequency, and the array bounds
         svnum, svbounds = self._svd_num(mi)
@@ -1460,23 +2174,22 @@ class BeamTransfer(object):
             dtype=np.complex128,
         )
 
-        for pi in range(npol):
-            for fi in self._svd_freq_iter(mi):
-
-                if conj:
-                    fbeam = beam[
-                        fi, : svnum[fi], pi, :
-                    ].T.conj()  # Beam matrix for this frequency and cut
-                else:
-                    fbeam = beam[
-                        fi, pi, :, : svnum[fi]
-                    ]  # Beam matrix for this frequency and cut
+        # Beam matrices for all frequencies, mapping the modes into pol and l
+        lside = self.telescope.lmax + 1
+        if conj:
+            fbeam = beam[:, :, :npol].transpose(0, 2, 3, 1).conj()
+        else:
+            fbeam = beam[:, :npol]
+        fbeam = fbeam.reshape(self.nfreq, npol * lside, -1)
 
-                lvec = vec[
-                    svbounds[fi] : svbounds[fi + 1]
-                ]  # Matrix section for this frequency
+        # Unpack into an array of all modes at each frequency (with the
+        # insignificant ones zero) so we can project all frequencies at once.
+        lvec = self._svd_unpack(mi, vec)
+        lvec = lvec.reshape(lvec.shape[:2] + (-1,))
 
-                vecf[fi, pi] += np.dot(fbeam, lvec)
+        vecf[:, :npol] = np.matmul(fbeam, lvec).reshape(
+            (self.nfreq, npol, lside) + vec.shape[1:]
+        )
 
         return vecf
 
@@ -1518,278 +2231,197 @@ class BeamTransfer(object):
 class BeamTransferTempSVD(BeamTransfer):
     """BeamTransfer class that performs the old temperature only SVD."""
 
-    def _generate_svdfiles(self, regen=False):
-        ## Generate all the SVD transfer matrices by simply iterating over all
-        ## m, performing the SVD, combining the beams and then write out the
-        ## results.
-
-        # For each `m` collect all the `m` sections from each frequency file,
-        # and write them into a new `m` file. Use MPI if available.
-        for mi in mpiutil.mpirange(self.telescope.mmax + 1):
+    def _generate_svdfiles(self, regen=False, skip_svd_inv=False):
+        self._generate_svdfiles_by_m(regen=regen, skip_svd_inv=skip_svd_inv)
 
-            if os.path.exists(self._svdfile(mi)) and not regen:
-                print(
-                    "m index %i. File: %s exists. Skipping..."
-                    % (mi, (self._svdfile(mi)))
-                )
-                continue
-            else:
-                print("m index %i. Creating SVD file: %s" % (mi, self._svdfile(mi)))
+    def _generate_svdfile_m(self, mi, skip_svd_inv=False):
+        ## Perform the SVD for all frequencies of a single m, combine the
+        ## beams and write out the results. Returns the singular values.
 
-            # Open m beams for reading.
-            fm = h5py.File(self._mfile(mi), "r")
+        # Open m beams for reading.
+        fm = h5py.File(self._mfile(mi), "r", rdcc_nbytes=self._rdcc_nbytes)
 
-            # Open file to write SVD results into.
-            fs = h5py.File(self._svdfile(mi), "w")
+        # Open file to write SVD results into.
+        fs = self._svdfile_h5(mi, "w")
 
-            # Create a chunked dataset for writing the SVD beam matrix into.
-            dsize_bsvd = (
-                self.telescope.nfreq,
-                self.svd_len,
-                self.telescope.num_pol_sky,
-                self.telescope.lmax + 1,
-            )
-            csize_bsvd = (
-                1,
-                min(10, self.svd_len),
-                self.telescope.num_pol_sky,
-                self.telescope.lmax + 1,
-            )
-            dset_bsvd = fs.create_dataset(
-                "beam_svd",
-                dsize_bsvd,
-                chunks=csize_bsvd,
-                compression="lzf",
-                dtype=np.complex128,
-            )
+        # Create a chunked dataset for writing the SVD beam matrix into.
+        dsize_bsvd = (
+            self.telescope.nfreq,
+            self.svd_len,
+            self.telescope.num_pol_sky,
+            self.telescope.lmax + 1,
+        )
+        dset_bsvd = fs.create_dataset(
+            "beam_svd",
+            dsize_bsvd,
+            chunks=self._svd_chunks["beam_svd"],
+            dtype=self._svd_dtype,
+            **self._compression_args
+        )
 
-            # Create a chunked dataset for writing the inverse SVD beam matrix into.
-            dsize_ibsvd = (
-                self.telescope.nfreq,
-                self.telescope.num_pol_sky,
-                self.telescope.lmax + 1,
-                self.svd_len,
-            )
-            csize_ibsvd = (
-                1,
-                self.telescope.num_pol_sky,
-                self.telescope.lmax + 1,
-                min(10, self.svd_len),
-            )
+        # Create a chunked dataset for writing the inverse SVD beam matrix into.
+        dsize_ibsvd = (
+            self.telescope.nfreq,
+            self.telescope.num_pol_sky,
+            self.telescope.lmax + 1,
+            self.svd_len,
+        )
+        if not skip_svd_inv:
             dset_ibsvd = fs.create_dataset(
                 "invbeam_svd",
                 dsize_ibsvd,
-                chunks=csize_ibsvd,
-                compression="lzf",
-                dtype=np.complex128,
-            )
-
-            # Create a chunked dataset for the stokes T U-matrix (left evecs)
-            dsize_ut = (self.telescope.nfreq, self.svd_len, self.ntel)
-            csize_ut = (1, min(10, self.svd_len), self.ntel)
-            dset_ut = fs.create_dataset(
-                "beam_ut",
-                dsize_ut,
-                chunks=csize_ut,
-                compression="lzf",
-                dtype=np.complex128,
+                chunks=self._svd_chunks["invbeam_svd"],
+                dtype=self._svd_dtype,
+                **self._compression_args
             )
 
-            # Create a dataset for the singular values.
-            dsize_sig = (self.telescope.nfreq, self.svd_len)
-            dset_sig = fs.create_dataset("singularvalues", dsize_sig, dtype=np.float64)
-
-            ## For each frequency in the m-files read in the block, SVD it,
-            ## and construct the new beam matrix, and save.
-            for fi in np.arange(self.telescope.nfreq):
-
-                # Read the positive and negative m beams, and combine into one.
-                bf = fm["beam_m"][fi][:].reshape(
-                    self.ntel, self.telescope.num_pol_sky, self.telescope.lmax + 1
-                )
-
-                noisew = self.telescope.noisepower(
-                    np.arange(self.telescope.npairs), fi
-                ).flatten() ** (-0.5)
-                noisew = np.concatenate([noisew, noisew])
-                bf = bf * noisew[:, np.newaxis, np.newaxis]
-
-                # Get the T-mode only beam matrix
-                bft = bf[:, 0, :]
+        # Create a chunked dataset for the stokes T U-matrix (left evecs)
+        dsize_ut = (self.telescope.nfreq, self.svd_len, self.ntel)
+        dset_ut = fs.create_dataset(
+            "beam_ut",
+            dsize_ut,
+            chunks=self._svd_chunks["beam_ut"],
+            dtype=self._svd_dtype,
+            **self._compression_args
+        )
 
-                # Perform the SVD to find the left evecs
-                u, sig, v = svd_gen(bft, full_matrices=False)
-                u = u.T.conj()  # We only need u^H so just keep that.
+        # Create a dataset for the singular values.
+        dsize_sig = (self.telescope.nfreq, self.svd_len)
+        dset_sig = fs.create_dataset("singularvalues", dsize_sig, dtype=np.float64)
 
-                # Save out the evecs (for transforming from the telescope frame into the SVD basis)
-                dset_ut[fi] = u * noisew[np.newaxis, :]
+        ## Read in the beams for all frequencies at once, SVD them in a
+        ## single batched call, construct the new beam matrices and save.
+        bf, noisew = self._load_weighted_beam_m(fm)
 
-                # Save out the modified beam matrix (for mapping from the sky into the SVD basis)
-                bsvd = np.dot(u, bf.reshape(self.ntel, -1))
-                dset_bsvd[fi] = bsvd.reshape(
-                    self.svd_len, self.telescope.num_pol_sky, self.telescope.lmax + 1
-                )
+        # Perform the SVD of the T-mode only beam matrices to find the left
+        # evecs. We only need u^H so just keep that.
+        u, sig, vh = _svd_stack(
+            bf[:, :, 0, :], errmsg="SVD m=%i" % mi, gram=self.svd_gram
+        )
+        u = np.swapaxes(u, 1, 2).conj()
 
-                # Find the pseudo-inverse of the beam matrix and save to disk.
-                dset_ibsvd[fi] = la.pinv(bsvd).reshape(
-                    self.telescope.num_pol_sky, self.telescope.lmax + 1, self.svd_len
-                )
+        # Save out the evecs (for transforming from the telescope frame
+        # into the SVD basis) and the singular values
+        dset_ut[:] = u * noisew[:, np.newaxis, :]
+        dset_sig[:] = sig
 
-                # Save out the singular values for each block
-                dset_sig[fi] = sig
+        # Save out the modified beam matrix (for mapping from the sky into
+        # the SVD basis)
+        bsvd = np.matmul(u, bf.reshape(self.nfreq, self.ntel, -1))
+        dset_bsvd[:] = bsvd.reshape(dsize_bsvd)
 
-            # Write a few useful attributes.
-            fs.attrs["baselines"] = self.telescope.baselines
-            fs.attrs["m"] = mi
-            fs.attrs["frequencies"] = self.telescope.frequencies
-            fs.attrs["cylobj"] = self._telescope_pickle
+        if not skip_svd_inv:
+            # Find the pseudo-inverse of the beam matrix and save to disk.
+            dset_ibsvd[:] = blockla.pinv_dm(bsvd).reshape(dsize_ibsvd)
 
-            fs.close()
-            fm.close()
+        # Write a few useful attributes.
+        fs.attrs["baselines"] = self.telescope.baselines
+        fs.attrs["m"] = mi
+        fs.attrs["frequencies"] = self.telescope.frequencies
 
-        # If we're part of an MPI run, synchronise here.
-        mpiutil.barrier()
+        fs.close()
+        fm.close()
 
-        # Collect the spectrum into a single file.
-        self._collect_svd_spectrum()
+        return sig
 
 
 class BeamTransferFullSVD(BeamTransfer):
     """BeamTransfer class that performs the old temperature only SVD."""
 
-    def _generate_svdfiles(self, regen=False):
-        ## Generate all the SVD transfer matrices by simply iterating over all
-        ## m, performing the SVD, combining the beams and then write out the
-        ## results.
-
-        # For each `m` collect all the `m` sections from each frequency file,
-        # and write them into a new `m` file. Use MPI if available.
-        for mi in mpiutil.mpirange(self.telescope.mmax + 1):
+    def _generate_svdfiles(self, regen=False, skip_svd_inv=False):
+        self._generate_svdfiles_by_m(regen=regen, skip_svd_inv=skip_svd_inv)
 
-            if os.path.exists(self._svdfile(mi)) and not regen:
-                print(
-                    "m index %i. File: %s exists. Skipping..."
-                    % (mi, (self._svdfile(mi)))
-                )
-                continue
-            else:
-                print("m index %i. Creating SVD file: %s" % (mi, self._svdfile(mi)))
+    def _generate_svdfile_m(self, mi, skip_svd_inv=False):
+        ## Perform the SVD for all frequencies of a single m, combine the
+        ## beams and write out the results. Returns the singular values.
 
-            # Open m beams for reading.
-            fm = h5py.File(self._mfile(mi), "r")
+        # Open m beams for reading.
+        fm = h5py.File(self._mfile(mi), "r", rdcc_nbytes=self._rdcc_nbytes)
 
-            # Open file to write SVD results into.
-            fs = h5py.File(self._svdfile(mi), "w")
+        # Open file to write SVD results into.
+        fs = self._svdfile_h5(mi, "w")
 
-            # Create a chunked dataset for writing the SVD beam matrix into.
-            dsize_bsvd = (
-                self.telescope.nfreq,
-                self.svd_len,
-                self.telescope.num_pol_sky,
-                self.telescope.lmax + 1,
-            )
-            csize_bsvd = (
-                1,
-                min(10, self.svd_len),
-                self.telescope.num_pol_sky,
-                self.telescope.lmax + 1,
-            )
-            dset_bsvd = fs.create_dataset(
-                "beam_svd",
-                dsize_bsvd,
-                chunks=csize_bsvd,
-                compression="lzf",
-                dtype=np.complex128,
-            )
+        # Create a chunked dataset for writing the SVD beam matrix into.
+        dsize_bsvd = (
+            self.telescope.nfreq,
+            self.svd_len,
+            self.telescope.num_pol_sky,
+            self.telescope.lmax + 1,
+        )
+        dset_bsvd = fs.create_dataset(
+            "beam_svd",
+            dsize_bsvd,
+            chunks=self._svd_chunks["beam_svd"],
+            dtype=self._svd_dtype,
+            **self._compression_args
+        )
 
-            # Create a chunked dataset for writing the inverse SVD beam matrix into.
-            dsize_ibsvd = (
-                self.telescope.nfreq,
-                self.telescope.num_pol_sky,
-                self.telescope.lmax + 1,
-                self.svd_len,
-            )
-            csize_ibsvd = (
-                1,
-                self.telescope.num_pol_sky,
-                self.telescope.lmax + 1,
-                min(10, self.svd_len),
-            )
+        # Create a chunked dataset for writing the inverse SVD beam matrix into.
+        dsize_ibsvd = (
+            self.telescope.nfreq,
+            self.telescope.num_pol_sky,
+            self.telescope.lmax + 1,
+            self.svd_len,
+        )
+        if not skip_svd_inv:
             dset_ibsvd = fs.create_dataset(
                 "invbeam_svd",
                 dsize_ibsvd,
-                chunks=csize_ibsvd,
-                compression="lzf",
-                dtype=np.complex128,
-            )
-
-            # Create a chunked dataset for the stokes T U-matrix (left evecs)
-            dsize_ut = (self.telescope.nfreq, self.svd_len, self.ntel)
-            csize_ut = (1, min(10, self.svd_len), self.ntel)
-            dset_ut = fs.create_dataset(
-                "beam_ut",
-                dsize_ut,
-                chunks=csize_ut,
-                compression="lzf",
-                dtype=np.complex128,
+                chunks=self._svd_chunks["invbeam_svd"],
+                dtype=self._svd_dtype,
+                **self._compression_args
             )
 
-            # Create a dataset for the singular values.
-            dsize_sig = (self.telescope.nfreq, self.svd_len)
-            dset_sig = fs.create_dataset("singularvalues", dsize_sig, dtype=np.float64)
-
-            ## For each frequency in the m-files read in the block, SVD it,
-            ## and construct the new beam matrix, and save.
-            for fi in np.arange(self.telescope.nfreq):
-
-                # Read the positive and negative m beams, and combine into one.
-                bf = fm["beam_m"][fi][:].reshape(
-                    self.ntel, self.telescope.num_pol_sky, self.telescope.lmax + 1
-                )
-
-                noisew = self.telescope.noisepower(
-                    np.arange(self.telescope.npairs), fi
-                ).flatten() ** (-0.5)
-                noisew = np.concatenate([noisew, noisew])
-                bf = bf * noisew[:, np.newaxis, np.newaxis]
-
-                bf = bf.reshape(self.ntel, -1)
+        # Create a chunked dataset for the stokes T U-matrix (left evecs)
+        dsize_ut = (self.telescope.nfreq, self.svd_len, self.ntel)
+        dset_ut = fs.create_dataset(
+            "beam_ut",
+            dsize_ut,
+            chunks=self._svd_chunks["beam_ut"],
+            dtype=self._svd_dtype,
+            **self._compression_args
+        )
 
-                # Perform the SVD to find the left evecs
-                u, sig, v = svd_gen(bf, full_matrices=False)
-                u = u.T.conj()  # We only need u^H so just keep that.
+        # Create a dataset for the singular values.
+        dsize_sig = (self.telescope.nfreq, self.svd_len)
+        dset_sig = fs.create_dataset("singularvalues", dsize_sig, dtype=np.float64)
 
-                # Save out the evecs (for transforming from the telescope frame into the SVD basis)
-                dset_ut[fi] = u * noisew[np.newaxis, :]
+        ## Read in the beams for all frequencies at once, SVD them in a
+        ## single batched call, construct the new beam matrices and save.
+        bf, noisew = self._load_weighted_beam_m(fm)
 
-                # Save out the modified beam matrix (for mapping from the sky into the SVD basis)
-                bsvd = np.dot(u, bf)
-                dset_bsvd[fi] = bsvd.reshape(
-                    self.svd_len, self.telescope.num_pol_sky, self.telescope.lmax + 1
-                )
+        # Perform the SVD to find the left evecs. We only need u^H so just
+        # keep that.
+        u, sig, _ = _svd_stack(
+            bf.reshape(self.nfreq, self.ntel, -1),
+            errmsg="SVD m=%i" % mi,
+            gram=self.svd_gram,
+        )
+        u = np.swapaxes(u, 1, 2).conj()
 
-                # Find the pseudo-inverse of the beam matrix and save to disk.
-                dset_ibsvd[fi] = la.pinv(bsvd).reshape(
-                    self.telescope.num_pol_sky, self.telescope.lmax + 1, self.svd_len
-                )
+        # Save out the evecs (for transforming from the telescope frame
+        # into the SVD basis) and the singular values
+        dset_ut[:] = u * noisew[:, np.newaxis, :]
+        dset_sig[:] = sig
 
-                # Save out the singular values for each block
-                dset_sig[fi] = sig
+        # Save out the modified beam matrix (for mapping from the sky into
+        # the SVD basis)
+        bsvd = np.matmul(u, bf.reshape(self.nfreq, self.ntel, -1))
+        dset_bsvd[:] = bsvd.reshape(dsize_bsvd)
 
-            # Write a few useful attributes.
-            fs.attrs["baselines"] = self.telescope.baselines
-            fs.attrs["m"] = mi
-            fs.attrs["frequencies"] = self.telescope.frequencies
-            fs.attrs["cylobj"] = self._telescope_pickle
+        if not skip_svd_inv:
+            # Find the pseudo-inverse of the beam matrix and save to disk.
+            dset_ibsvd[:] = blockla.pinv_dm(bsvd).reshape(dsize_ibsvd)
 
-            fs.close()
-            fm.close()
+        # Write a few useful attributes.
+        fs.attrs["baselines"] = self.telescope.baselines
+        fs.attrs["m"] = mi
+        fs.attrs["frequencies"] = self.telescope.frequencies
 
-        # If we're part of an MPI run, synchronise here.
-        mpiutil.barrier()
+        fs.close()
+        fm.close()
 
-        # Collect the spectrum into a single file.
-        self._collect_svd_spectrum()
+        return sig
 
     @property
     def svd_len(self):
@@ -1812,9 +2444,40 @@ class BeamTransferNoSVD(BeamTransfer):
     def project_matrix_diagonal_telescope_to_svd(self, mi, dmat, *args, **kwargs):
         return np.diag(dmat.flatten())
 
+    def project_matrix_diagonal_telescope_to_svd_sparse(self, mi, dmat):
+        # The matrix stays diagonal, so return it in sparse form rather than
+        # allocating the full dense matrix
+        return sparse.diags(dmat.ravel())
+
     def project_vector_telescope_to_svd(self, mi, vec, *args, **kwargs):
         return vec
 
+    def project_vector_svd_to_sky(self, mi, vec, temponly=False, conj=False):
+        npol = 1 if temponly else self.telescope.num_pol_sky
+        lside = self.telescope.lmax + 1
+
+        # The SVD basis is just the telescope basis, so project all the
+        # frequencies at once with the pseudo-inverse (or conjugate) beams
+        if conj:
+            beam = self.beam_m(mi).reshape(self.nfreq, self.ntel, -1, lside)
+            fbeam = beam[:, :, :npol].reshape(self.nfreq, self.ntel, npol * lside)
+            fbeam = np.swapaxes(fbeam, 1, 2).conj()
+        else:
+            ibeam = self.invbeam_m(mi).reshape(self.nfreq, -1, lside, self.ntel)
+            fbeam = ibeam[:, :npol].reshape(self.nfreq, npol * lside, self.ntel)
+
+        vecf = np.zeros(
+            (self.nfreq, self.telescope.num_pol_sky, lside) + vec.shape[1:],
+            dtype=np.complex128,
+        )
+
+        tvec = vec.reshape(self.nfreq, self.ntel, -1)
+        vecf[:, :npol] = np.matmul(fbeam, tvec).reshape(
+            (self.nfreq, npol, lside) + vec.shape[1:]
+        )
+
+        return vecf
+
     def beam_svd(self, mi, *args, **kwargs):
         return self.beam_m(mi)
 
@@ -11,6 +11,7 @@ import re
 
 import numpy as np
 import scipy.linalg as la
+import scipy.sparse as sparse
 import h5py
 
 from caput import config, mpiutil
@@ -124,7 +125,7 @@ def eigh_gen(A, B, message=""):
                     "Strange convergence issue. Trying non divide and conquer routine."
                 )
                 evals, evecs = la.eigh(
-                    A, B, overwrite_a=True, overwrite_b=True, turbo=False
+                    A, B, overwrite_a=True, overwrite_b=True, driver="gv"
                 )
 
     return evals, evecs, add_const
@@ -305,15 +306,19 @@ class KLTransform(config.Reader):
         if not self.use_thermal:
             nc = (1e-3 / self.telescope.tsys_flat) ** 2
 
-        # Construct diagonal noise power in telescope basis
-        bl = np.arange(self.telescope.npairs)
-        bl = np.concatenate((bl, bl))
-        npower = nc * self.telescope.noisepower(
-            bl[np.newaxis, :], np.arange(self.telescope.nfreq)[:, np.newaxis]
-        ).reshape(self.telescope.nfreq, self.beamtransfer.ntel)
+        # Construct diagonal noise power in telescope basis. This is the same
+        # for every m, so use the copy cached by the beam transfers.
+        npower = nc * self.beamtransfer.noise_power()
 
-        # Project into SVD basis and add into noise matrix
-        cvb_n += self.beamtransfer.project_matrix_diagonal_telescope_to_svd(mi, npower)
+        # Project into SVD basis and add into noise matrix. This may be
+        # returned as a sparse matrix, in which case it's diagonal.
+        nproj = self.beamtransfer.project_matrix_diagonal_telescope_to_svd_sparse(
+            mi, npower
+        )
+        if sparse.issparse(nproj):
+            cnr[np.diag_indices_from(cnr)] += nproj.diagonal()
+        else:
+            cvb_n += nproj
 
         return cvb_s, cvb_n
 
@@ -866,14 +871,22 @@ class KLTransform(config.Reader):
         # print "Evsky: %f" % (et-st)
 
         st = time.time()
-        ev1n = np.transpose(evsky, (2, 3, 0, 1)).copy()
-        ev1h = np.transpose(evsky, (2, 3, 1, 0)).conj()
-        matf = np.zeros((evsky.shape[0], evsky.shape[0]), dtype=np.complex128)
-
-        for pi in range(npol):
-            for pj in range(npol):
-                for li in range(lside):
-                    matf += np.dot(np.dot(ev1n[pi, li], mat[pi, pj, li]), ev1h[pj, li])
+        nmodes = evsky.shape[0]
+
+        # Pack the modes as [l, mode, pol*freq], and the sky matrix to match, so
+        # the sum over polarisations and frequencies is a single matrix product
+        # batched over l, and the sum over l is then one more matrix product.
+        ev = np.ascontiguousarray(np.transpose(evsky, (3, 0, 2, 1)))
+        ev = ev.reshape(lside, nmodes, npol * nfreq)
+        lmat = np.transpose(mat[:npol, :npol], (2, 0, 3, 1, 4)).reshape(
+            lside, npol * nfreq, npol * nfreq
+        )
+        evm = np.matmul(ev, lmat)
+
+        matf = np.dot(
+            np.transpose(evm, (1, 0, 2)).reshape(nmodes, -1),
+            np.transpose(ev, (1, 0, 2)).reshape(nmodes, -1).T.conj(),
+        )
 
         et = time.time()
 
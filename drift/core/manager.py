@@ -237,6 +237,32 @@ class ProductManager(object):
         if "polsvcut" in yconf["config"]:
             self.beamtransfer.polsvcut = float(yconf["config"]["polsvcut"])
 
+        # Set the number of threads to use when generating the SVD files
+        if "svd_threads" in yconf["config"]:
+            self.beamtransfer.svd_threads = int(yconf["config"]["svd_threads"])
+
+        if yconf["config"].get("svd_randomized"):
+            self.beamtransfer.svd_randomized = True
+
+        if yconf["config"].get("svd_gram"):
+            self.beamtransfer.svd_gram = True
+
+        # Set the number of m's to keep the SVD beams in memory for
+        if "svd_cache_size" in yconf["config"]:
+            self.beamtransfer.svd_cache_size = int(yconf["config"]["svd_cache_size"])
+
+        # Compress the beam transfer files on disk if requested
+        if yconf["config"].get("compression"):
+            self.beamtransfer.compression = True
+
+        # Store the SVD beam transfers in single precision if requested
+        if yconf["config"].get("svd_single_precision"):
+            self.beamtransfer.svd_single_precision = True
+
+        # Write the SVD files in the HDF5 1.10 format if requested
+        if yconf["config"].get("svd_hdf5_v110"):
+            self.beamtransfer.svd_hdf5_v110 = True
+
         if yconf["config"].get("beamtransfers"):
             self.gen_beams = True
 
@@ -515,7 +515,7 @@ class Timestream(object):
 
         fisher, bias = ps.fisher_bias()
 
-        powerspectrum = np.dot(la.inv(fisher), qtotal - bias)
+        powerspectrum = la.solve(fisher, qtotal - bias)
 
         if mpiutil.rank0:
             with h5py.File(self._psfile, "w") as f:
@@ -640,7 +640,7 @@ def cross_powerspectrum(timestreams, psname, psfile):
     # Subtract bias and reshape into new array
     qtotal = (qtotal - bias).reshape(nstream ** 2, ps.nbands).T
 
-    powerspectrum = np.dot(la.inv(fisher), qtotal)
+    powerspectrum = la.solve(fisher, qtotal)
     powerspectrum = powerspectrum.T.reshape(nstream, nstream, ps.nbands)
 
     if mpiutil.rank0:
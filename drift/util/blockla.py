@@ -5,6 +5,8 @@ from future.builtins.disabled import *  # noqa  pylint: disable=W0401, W0614
 
 # === End Python 2/3 compatibility
 
+import warnings
+
 import numpy as np
 import scipy.linalg
 
@@ -124,10 +126,18 @@ def multiply_dm_dm(matrix1, matrix2):
 def pinv_dm(matrix, *args, **kwargs):
     """Construct the pseudo-inverse of a block diagonal matrix.
 
+    All the blocks are decomposed in a single batched SVD call.
+
     Parameters
     ----------
     matrix : (nblocks, n, m) np.ndarray
         An array containing `nblocks` diagonal blocks of size (`n`, `m`).
+    rcond : float, optional
+        Cutoff for small singular values, relative to the largest in each
+        block. By default this is set by the machine precision.
+    *args, **kwargs
+        Any other arguments are deprecated. If given, they are passed on to
+        `scipy.linalg.pinv`, which is then called for each block in turn.
 
     Returns
     -------
@@ -135,11 +145,36 @@ def pinv_dm(matrix, *args, **kwargs):
          An array containing the pseudo-inverse.
     """
 
+    rcond = kwargs.pop("rcond", None)
+
     nblocks, n, m = matrix.shape
 
-    pinv_matrix = np.empty((nblocks, m, n), dtype=matrix.dtype)
+    if args or kwargs:
+        warnings.warn(
+            "Passing arguments other than `rcond` to pinv_dm is deprecated.",
+            DeprecationWarning,
+        )
 
-    for i in range(nblocks):
-        pinv_matrix[i] = scipy.linalg.pinv(matrix[i], *args, **kwargs)
+        if rcond is not None:
+            kwargs["rcond"] = rcond
+
+        pinv_matrix = np.empty((nblocks, m, n), dtype=matrix.dtype)
+
+        for i in range(nblocks):
+            pinv_matrix[i] = scipy.linalg.pinv(matrix[i], *args, **kwargs)
+
+        return pinv_matrix
+
+    if rcond is None:
+        rcond = np.finfo(matrix.dtype).eps * max(n, m)
+
+    u, sig, vh = np.linalg.svd(matrix, full_matrices=False)
+
+    # Invert the singular values above the cutoff in each block
+    cutoff = rcond * sig[:, :1]
+    sinv = np.zeros_like(sig)
+    np.divide(1.0, sig, out=sinv, where=(sig > cutoff))
+
+    vs = np.swapaxes(vh, -1, -2).conj() * sinv[:, np.newaxis, :]
 
-    return pinv_matrix
+    return np.matmul(vs, np.swapaxes(u, -1, -2).conj())
@@ -5,6 +5,7 @@ from future.builtins.disabled import *  # noqa  pylint: disable=W0401, W0614
 
 # === End Python 2/3 compatibility
 
+import collections
 import functools
 
 import numpy as np
@@ -40,6 +41,88 @@ def cache_last(func):
     return decorated
 
 
+def threaded_map(func, items, nthreads=1):
+    """Apply a function to a sequence of items, possibly using threads.
+
+    This is useful for work dominated by calls that release the GIL (e.g.
+    LAPACK). Results are yielded in order, and only a limited number of items
+    are processed ahead of the consumer to bound the memory used.
+
+    Parameters
+    ----------
+    func : callable
+        Function to apply to each item.
+    items : iterable
+        Items to process.
+    nthreads : integer, optional
+        Number of threads to use. If one or less (default), just process the
+        items serially in the calling thread.
+
+    Returns
+    -------
+    results : generator
+        The results of `func` for each item in turn.
+    """
+
+    if nthreads <= 1:
+        for item in items:
+            yield func(item)
+        return
+
+    from concurrent import futures
+
+    with futures.ThreadPoolExecutor(max_workers=nthreads) as executor:
+
+        pending = collections.deque()
+
+        for item in items:
+            pending.append(executor.submit(func, item))
+
+            if len(pending) >= 2 * nthreads:
+                yield pending.popleft().result()
+
+        while pending:
+            yield pending.popleft().result()
+
+
+def prefetch_map(func, items):
+    """Apply a function to a sequence of items, one item ahead in a thread.
+
+    While the consumer works on the result for one item, the function is
+    evaluated for the next item in a background thread. This is useful for
+    overlapping I/O with computation.
+
+    Parameters
+    ----------
+    func : callable
+        Function to apply to each item.
+    items : iterable
+        Items to process.
+
+    Returns
+    -------
+    results : generator
+        The results of `func` for each item in turn.
+    """
+
+    from concurrent import futures
+
+    with futures.ThreadPoolExecutor(max_workers=1) as executor:
+
+        pending = None
+
+        for item in items:
+            future = executor.submit(func, item)
+
+            if pending is not None:
+                yield pending.result()
+
+            pending = future
+
+        if pending is not None:
+            yield pending.result()
+
+
 class ConfigReader(object):
     """A class for applying attribute values from a supplied dictionary.
 
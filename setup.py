@@ -22,7 +22,7 @@ setup(
     packages=find_packages(),
     install_requires=[
         "numpy>=1.7",
-        "scipy",
+        "scipy>=1.5",
         "healpy>=1.8",
         "h5py",
         "caput>=0.3",
@@ -0,0 +1,475 @@
+# === Start Python 2/3 compatibility
+from __future__ import absolute_import, division, print_function, unicode_literals
+from future.builtins import *  # noqa  pylint: disable=W0401, W0614
+from future.builtins.disabled import *  # noqa  pylint: disable=W0401, W0614
+
+# === End Python 2/3 compatibility
+
+
+import h5py
+import numpy as np
+import scipy.sparse as sparse
+
+from drift.core import beamtransfer
+from drift.util import blockla
+
+
+class FakeTelescope(object):
+    """A tiny telescope with random transfer matrices.
+
+    Only the parts used by the beam transfers are implemented. If `rank` is
+    set, the transfer matrices for all the baselines at a frequency are
+    combinations of only `rank` underlying beams, so the beam transfer
+    matrices are rank deficient.
+    """
+
+    def __init__(self, nfreq=4, npairs=6, lmax=5, mmax=3, npol=1, rank=None):
+        self.nfreq = nfreq
+        self.npairs = npairs
+        self.nbase = npairs
+        self.lmax = lmax
+        self.mmax = mmax
+        self.num_pol_sky = npol
+        self.rank = rank
+        self.frequencies = np.linspace(400.0, 500.0, nfreq)
+        self.baselines = np.arange(2.0 * npairs).reshape(npairs, 2)
+        self.redundancy = np.arange(1, npairs + 1)
+
+    def noisepower(self, bl_indices, f_indices, ndays=None):
+        bl_indices, f_indices = np.broadcast_arrays(bl_indices, f_indices)
+        # Make the frequency dependence differ between baselines
+        return (1.0 + 0.1 * f_indices * bl_indices) / self.redundancy[bl_indices]
+
+    def transfer_matrices(self, bl_indices, f_indices):
+        bl_indices, f_indices = np.broadcast_arrays(bl_indices, f_indices)
+
+        lside = self.lmax + 1
+        shape = (self.num_pol_sky, lside, 2 * lside - 1)
+        nbeam = self.npairs if self.rank is None else self.rank
+
+        tm = np.zeros(bl_indices.shape + shape, dtype=np.complex128)
+
+        for ind in np.ndindex(bl_indices.shape):
+            bi, fi = bl_indices[ind], f_indices[ind]
+
+            # The underlying beams at this frequency, and their weights
+            rs = np.random.RandomState(fi)
+            beams = rs.standard_normal((nbeam,) + shape)
+            beams = beams + 1j * rs.standard_normal((nbeam,) + shape)
+            weights = np.identity(nbeam)[bi % nbeam]
+            if self.rank is not None:
+                weights = rs.standard_normal((self.npairs, nbeam))[bi]
+
+            tm[ind] = np.tensordot(weights, beams, axes=1)
+
+        # Make the polarised response smaller than the unpolarised
+        tm[..., 1:, :, :] *= 0.1
+
+        return tm
+
+
+def _lowrank(n, m, rank, seed=0):
+    # Generate a complex matrix of a given rank
+    rs = np.random.RandomState(seed)
+    a = rs.standard_normal((n, rank)) + 1j * rs.standard_normal((n, rank))
+    b = rs.standard_normal((rank, m)) + 1j * rs.standard_normal((rank, m))
+    return np.dot(a, b)
+
+
+def test_matrix_image_randomized():
+
+    A = _lowrank(200, 150, 12)
+
+    u0, s0 = beamtransfer.matrix_image(A, rtol=1e-10)
+    u1, s1 = beamtransfer.matrix_image_randomized(A, 4, rtol=1e-10)
+
+    assert u1.shape == u0.shape
+
+    # Check the bases span the same space
+    proj = np.dot(u0.T.conj(), u1)
+    assert np.allclose(np.dot(proj.T.conj(), proj), np.identity(u1.shape[1]))
+    assert np.allclose(s1[:12], s0[:12])
+
+
+def test_svd_thin_gram():
+
+    rs = np.random.RandomState(1)
+    A = rs.standard_normal((3, 80, 10)) + 1j * rs.standard_normal((3, 80, 10))
+
+    u, s, vh = beamtransfer.svd_thin_gram(A)
+    s0 = np.linalg.svd(A, compute_uv=False)
+
+    assert u.shape == (3, 80, 10)
+    assert np.allclose(s, s0)
+
+    # Check the decomposition is orthonormal and reconstructs the matrix
+    uhu = np.matmul(np.swapaxes(u, 1, 2).conj(), u)
+    assert np.allclose(uhu, np.identity(10)[np.newaxis])
+    assert np.allclose(np.matmul(u * s[:, np.newaxis, :], vh), A)
+
+
+def test_matrix_nullspace():
+
+    # Check both wide and tall matrices give the complete left nullspace
+    for n, m in [(20, 50), (50, 20)]:
+        A = _lowrank(n, m, 8)
+
+        null, s = beamtransfer.matrix_nullspace(A, rtol=1e-10)
+
+        assert null.shape == (n, n - 8)
+        assert np.allclose(np.dot(null.T.conj(), null), np.identity(n - 8))
+        assert np.allclose(np.dot(null.T.conj(), A), 0.0)
+
+
+def test_generate_mfiles(tmpdir):
+
+    # Check the m ordered beams against the telescope transfer matrices,
+    # including the edge case of only having m=0
+    for mmax in [3, 0]:
+        bt = beamtransfer.BeamTransfer(
+            str(tmpdir.join("mmax%i" % mmax)), telescope=FakeTelescope(mmax=mmax)
+        )
+        bt.generate(skip_svd=True)
+        tel = bt.telescope
+
+        tm = tel.transfer_matrices(
+            np.arange(tel.nbase)[np.newaxis, :], np.arange(tel.nfreq)[:, np.newaxis]
+        )
+
+        for mi in range(mmax + 1):
+            beam = bt.beam_m(mi)
+
+            assert beam.shape == (tel.nfreq, 2, tel.nbase, 1, tel.lmax + 1)
+            assert np.allclose(beam[:, 0], tm[..., mi])
+
+            # Negative m are wrapped around to the end of the transfer matrix
+            if mi > 0:
+                assert np.allclose(beam[:, 1], (-1) ** mi * tm[..., -mi].conj())
+            else:
+                assert (beam[:, 1] == 0.0).all()
+
+
+def _weighted_beam(bt, mi, fi):
+    # The noise weighted beam transfer matrix for a single frequency, packed as
+    # [ntel, nsky]
+    tel = bt.telescope
+    noisew = tel.noisepower(np.arange(tel.npairs), fi) ** -0.5
+    noisew = np.concatenate([noisew, noisew])
+    return bt.beam_m(mi)[fi].reshape(bt.ntel, -1) * noisew[:, np.newaxis], noisew
+
+
+def test_invbeam_m(tmpdir):
+
+    # Check the pseudo-inverse is noise weighted with the noise at each
+    # frequency (the fake telescope's noise varies with frequency, differently
+    # on each baseline)
+    bt = beamtransfer.BeamTransfer(str(tmpdir), telescope=FakeTelescope(npairs=12))
+    bt.generate(skip_svd=True)
+
+    for mi in range(bt.telescope.mmax + 1):
+        ibeam = bt.invbeam_m(mi).reshape(bt.nfreq, -1, bt.ntel)
+
+        for fi in range(bt.nfreq):
+            bf, noisew = _weighted_beam(bt, mi, fi)
+            ib = np.linalg.pinv(bf, rcond=1e-6) * noisew[np.newaxis, :]
+
+            assert np.allclose(ibeam[fi], ib)
+
+
+def test_svd_by_m(tmpdir):
+
+    # Check the SVD files for the subclasses that process all frequencies of
+    # an m at once against a straightforward calculation at each frequency
+    for cls in [beamtransfer.BeamTransferTempSVD, beamtransfer.BeamTransferFullSVD]:
+        for npol in [1, 3]:
+            directory = tmpdir.join("%s_%i" % (cls.__name__, npol))
+            bt = cls(str(directory), telescope=FakeTelescope(npol=npol))
+            bt.svd_threads = 2
+            bt.generate()
+
+            for mi in range(bt.telescope.mmax + 1):
+                ut = bt.beam_ut(mi)
+                sig = bt.beam_singularvalues(mi)
+                bsvd = bt.beam_svd(mi).reshape(bt.nfreq, bt.svd_len, -1)
+                ibsvd = bt.invbeam_svd(mi).reshape(bt.nfreq, -1, bt.svd_len)
+
+                for fi in range(bt.nfreq):
+                    bf, noisew = _weighted_beam(bt, mi, fi)
+
+                    if cls is beamtransfer.BeamTransferTempSVD:
+                        bft = bf.reshape(bt.ntel, npol, -1)[:, 0]
+                    else:
+                        bft = bf
+                    u, s, vh = np.linalg.svd(bft, full_matrices=False)
+                    uh = u.T.conj()
+                    bsvd0 = np.dot(uh, bf)
+
+                    assert np.allclose(sig[fi], s)
+
+                    # The singular vectors are only defined up to a phase, so
+                    # compare products in which that cancels
+                    assert np.allclose(
+                        np.dot(ut[fi].T.conj(), bsvd[fi]),
+                        np.dot((uh * noisew).T.conj(), bsvd0),
+                    )
+                    assert np.allclose(
+                        np.dot(ibsvd[fi], ut[fi]),
+                        np.dot(np.linalg.pinv(bsvd0), uh * noisew),
+                    )
+
+
+def test_invbeam_svd_rank_deficient(tmpdir):
+
+    # Check the inverse SVD beams of rank deficient beams are the
+    # pseudo-inverse of the SVD beams as stored, including when the SVD is
+    # calculated with the less accurate Gram matrix method
+    classes = [
+        beamtransfer.BeamTransfer,
+        beamtransfer.BeamTransferTempSVD,
+        beamtransfer.BeamTransferFullSVD,
+    ]
+    for cls in classes:
+        for gram in [False, True]:
+            for npol in [1, 3]:
+                directory = tmpdir.join("%s_%i_%i" % (cls.__name__, gram, npol))
+                tel = FakeTelescope(npairs=12, lmax=4, npol=npol, rank=2)
+                bt = cls(str(directory), telescope=tel)
+                bt.svd_gram = gram
+                bt.generate()
+
+                for mi in range(tel.mmax + 1):
+                    bsvd = bt.beam_svd(mi).reshape(bt.nfreq, bt.svd_len, -1)
+                    ibsvd = bt.invbeam_svd(mi).reshape(bt.nfreq, -1, bt.svd_len)
+
+                    assert np.allclose(ibsvd, blockla.pinv_dm(bsvd))
+
+
+def test_svdfile_unused_modes(tmpdir):
+
+    # Only the modes up to the largest number at any frequency are written,
+    # check that everything beyond the modes at each frequency reads back as
+    # zero. The polarisation projection leaves 4 of the 6 modes (and none at
+    # all for m=0)
+    bt = beamtransfer.BeamTransfer(
+        str(tmpdir), telescope=FakeTelescope(npol=3, npairs=8)
+    )
+    bt.generate()
+
+    for mi in range(bt.telescope.mmax + 1):
+        with h5py.File(bt._svdfile(mi), "r") as fs:
+            nmodes = (fs["singularvalues"][:] > 0.0).sum(axis=1)
+            assert (nmodes == (0 if mi == 0 else 4)).all()
+
+            for name in ["beam_ut", "beam_svd", "invbeam_svd"]:
+                assert fs[name].fillvalue == 0
+
+            ut = fs["beam_ut"][:]
+            bsvd = fs["beam_svd"][:]
+            ibsvd = fs["invbeam_svd"][:]
+
+        for fi in range(bt.nfreq):
+            assert (ut[fi, nmodes[fi] :] == 0.0).all()
+            assert (bsvd[fi, nmodes[fi] :] == 0.0).all()
+            assert (ibsvd[fi, ..., nmodes[fi] :] == 0.0).all()
+
+
+def test_svd_projections(tmpdir):
+
+    rs = np.random.RandomState(2)
+
+    for npol in [1, 3]:
+        # Have more baselines than sky modes so there is a polarisation null
+        # space for the polarised case
+        bt = beamtransfer.BeamTransfer(
+            str(tmpdir.join("pol%i" % npol)),
+            telescope=FakeTelescope(npol=npol, npairs=12),
+        )
+        bt.generate()
+
+        # Cut enough modes that the number kept differs between frequencies
+        bt.svcut = 0.2
+
+        nfreq, ntel, lside = bt.nfreq, bt.ntel, bt.telescope.lmax + 1
+        counts = set()
+
+        for mi in range(bt.telescope.mmax + 1):
+            svnum, svbounds = bt._svd_num(mi)
+            counts.update(svnum)
+            nsvd = svbounds[-1]
+
+            beam = bt.beam_svd(mi)
+            ibeam = bt.invbeam_svd(mi)
+            ut = bt.beam_ut(mi)
+            noise = np.concatenate(
+                [
+                    bt.telescope.noisepower(
+                        np.arange(bt.telescope.npairs)[np.newaxis, :],
+                        np.arange(nfreq)[:, np.newaxis],
+                    )
+                ]
+                * 2,
+                axis=1,
+            )
+
+            skyvec = rs.standard_normal((nfreq, npol, lside, 2)) + 0j
+            telvec = rs.standard_normal((nfreq, ntel, 2)) + 0j
+            svec = rs.standard_normal((nsvd, 2)) + 1j * rs.standard_normal((nsvd, 2))
+            cl = rs.standard_normal((npol, npol, lside, nfreq, nfreq))
+            cl = cl + cl.transpose(1, 0, 2, 4, 3)
+            dmat = rs.uniform(1.0, 2.0, size=(nfreq, ntel))
+
+            # Calculate the projections one frequency at a time
+            s2svd = np.zeros((nsvd, 2), dtype=np.complex128)
+            t2svd = np.zeros((nsvd, 2), dtype=np.complex128)
+            svd2t = np.zeros((nfreq, ntel), dtype=np.complex128)
+            svd2s = np.zeros((nfreq, npol, lside, 2), dtype=np.complex128)
+            svd2s_conj = np.zeros((nfreq, npol, lside, 2), dtype=np.complex128)
+            ms2svd = np.zeros((nsvd, nsvd), dtype=np.complex128)
+            mt2svd = np.zeros((nsvd, nsvd), dtype=np.complex128)
+
+            for fi in range(nfreq):
+                fsl = slice(svbounds[fi], svbounds[fi + 1])
+                fbeam = beam[fi, : svnum[fi]]
+                fut = ut[fi, : svnum[fi]]
+
+                t2svd[fsl] = np.dot(fut, telvec[fi])
+                svd2t[fi] = noise[fi] * np.dot(fut.T.conj(), svec[fsl, 0])
+                mt2svd[fsl, fsl] = np.dot(fut * dmat[fi], fut.T.conj())
+
+                for pi in range(npol):
+                    s2svd[fsl] += np.dot(fbeam[:, pi], skyvec[fi, pi])
+                    svd2s[fi, pi] = np.dot(ibeam[fi, pi, :, : svnum[fi]], svec[fsl])
+                    svd2s_conj[fi, pi] = np.dot(fbeam[:, pi].T.conj(), svec[fsl])
+
+                    for fj in range(nfreq):
+                        fjsl = slice(svbounds[fj], svbounds[fj + 1])
+                        fjbeam = beam[fj, : svnum[fj], :]
+                        for pj in range(npol):
+                            ms2svd[fsl, fjsl] += np.dot(
+                                fbeam[:, pi] * cl[pi, pj, :, fi, fj],
+                                fjbeam[:, pj].T.conj(),
+                            )
+
+            assert np.allclose(bt.project_vector_sky_to_svd(mi, skyvec), s2svd)
+            assert np.allclose(bt.project_vector_telescope_to_svd(mi, telvec), t2svd)
+            assert np.allclose(
+                bt.project_vector_svd_to_telescope(mi, svec[:, 0]),
+                svd2t.reshape(nfreq, 2, -1),
+            )
+            assert np.allclose(bt.project_vector_svd_to_sky(mi, svec), svd2s)
+            assert np.allclose(
+                bt.project_vector_svd_to_sky(mi, svec, conj=True), svd2s_conj
+            )
+            assert np.allclose(bt.project_matrix_sky_to_svd(mi, cl), ms2svd)
+
+            # Check again with the modes split into several blocks, with block
+            # sizes that don't all divide the number of modes
+            for nblock in [3, 5]:
+                bt._proj_block_bytes = nblock * npol * npol * lside * cl.itemsize
+                assert np.allclose(bt.project_matrix_sky_to_svd(mi, cl), ms2svd)
+            del bt._proj_block_bytes
+
+            assert np.allclose(
+                bt.project_matrix_diagonal_telescope_to_svd(mi, dmat), mt2svd
+            )
+
+            # Check the temperature only projections just use the first
+            # polarisation
+            skyvec_t = skyvec.copy()
+            skyvec_t[:, 1:] = 0.0
+            assert np.allclose(
+                bt.project_vector_sky_to_svd(mi, skyvec, temponly=True),
+                bt.project_vector_sky_to_svd(mi, skyvec_t),
+            )
+            svd2s_t = bt.project_vector_svd_to_sky(mi, svec, temponly=True)
+            assert np.allclose(svd2s_t[:, :1], svd2s[:, :1])
+            assert (svd2s_t[:, 1:] == 0.0).all()
+
+            # Mapping from the SVD basis back to the telescope (or the sky) and
+            # then projecting again should return the original vector
+            tvec = bt.project_vector_svd_to_telescope(mi, svec[:, 0])
+            tvec = tvec.reshape(nfreq, ntel)
+            assert np.allclose(bt.project_vector_telescope_to_svd(mi, tvec), svec[:, 0])
+            assert np.allclose(
+                bt.project_vector_sky_to_svd(
+                    mi, bt.project_vector_svd_to_sky(mi, svec)
+                ),
+                svec,
+            )
+
+        # Make sure the test actually covered frequencies with different
+        # numbers of modes
+        assert len(counts) > 1
+
+
+def test_nosvd_project_vector_svd_to_sky(tmpdir):
+
+    rs = np.random.RandomState(3)
+
+    for npol in [1, 3]:
+        bt = beamtransfer.BeamTransferNoSVD(
+            str(tmpdir.join("pol%i" % npol)), telescope=FakeTelescope(npol=npol)
+        )
+        # The projections shouldn't need any SVD files
+        bt.generate(skip_svd=True)
+
+        nfreq, ntel, lside = bt.nfreq, bt.ntel, bt.telescope.lmax + 1
+
+        for mi in range(bt.telescope.mmax + 1):
+            beam = bt.beam_m(mi).reshape(nfreq, ntel, npol, lside)
+            ibeam = bt.invbeam_m(mi).reshape(nfreq, npol, lside, ntel)
+
+            vec = rs.standard_normal((nfreq * ntel, 2)) + 0j
+
+            for temponly in [False, True]:
+                npol_p = 1 if temponly else npol
+
+                # Project one frequency and polarisation at a time
+                svd2s = np.zeros((nfreq, npol, lside, 2), dtype=np.complex128)
+                svd2s_conj = np.zeros((nfreq, npol, lside, 2), dtype=np.complex128)
+                for fi in range(nfreq):
+                    fvec = vec[fi * ntel : (fi + 1) * ntel]
+                    for pi in range(npol_p):
+                        svd2s[fi, pi] = np.dot(ibeam[fi, pi], fvec)
+                        svd2s_conj[fi, pi] = np.dot(beam[fi, :, pi].T.conj(), fvec)
+
+                assert np.allclose(
+                    bt.project_vector_svd_to_sky(mi, vec, temponly=temponly), svd2s
+                )
+                assert np.allclose(
+                    bt.project_vector_svd_to_sky(mi, vec, temponly=temponly, conj=True),
+                    svd2s_conj,
+                )
+
+            # The SVD basis is the telescope basis, so this is just map-making
+            assert np.allclose(
+                bt.project_vector_svd_to_sky(mi, vec[:, 0]),
+                bt.project_vector_telescope_to_sky(mi, vec[:, 0]),
+            )
+
+
+def test_project_matrix_diagonal_telescope_to_svd(tmpdir):
+
+    rs = np.random.RandomState(4)
+
+    for cls in [beamtransfer.BeamTransfer, beamtransfer.BeamTransferNoSVD]:
+        bt = cls(str(tmpdir.join(cls.__name__)), telescope=FakeTelescope())
+        bt.generate()
+
+        dmat = rs.uniform(1.0, 2.0, size=(bt.nfreq, bt.ntel))
+
+        for mi in range(bt.telescope.mmax + 1):
+            # The projection is always dense, but the sparse variant may only
+            # be sparse if the projected matrix is still diagonal
+            proj = bt.project_matrix_diagonal_telescope_to_svd(mi, dmat)
+            sproj = bt.project_matrix_diagonal_telescope_to_svd_sparse(mi, dmat)
+
+            assert isinstance(proj, np.ndarray)
+            assert proj.shape == (bt.ndof(mi), bt.ndof(mi))
+
+            if cls is beamtransfer.BeamTransferNoSVD:
+                assert sparse.issparse(sproj)
+                assert np.allclose(proj, np.diag(dmat.ravel()))
+                sproj = sproj.toarray()
+
+            assert np.allclose(sproj, proj)
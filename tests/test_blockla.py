@@ -12,6 +12,8 @@ import numpy as np
 
 import scipy.linalg as la
 
+import pytest
+
 
 def test_blocksvd():
 
@@ -33,3 +35,30 @@ def test_blocksvd():
     assert np.allclose(np.dot(ub[1, :, 0], ub[1, :, 1]), 0.0)
 
     assert np.allclose(np.dot(vb[0, :, 0], vb[0, :, 2]), 0.0)
+
+
+def test_blockpinv():
+
+    b1 = np.random.standard_normal((3, 4, 5)) + 1.0j * np.random.standard_normal(
+        (3, 4, 5)
+    )
+
+    # Make one of the blocks rank deficient
+    b1[1, 3] = b1[1, 2]
+
+    pb = blockla.pinv_dm(b1, rcond=1e-10)
+
+    for i in range(3):
+        assert np.allclose(pb[i], np.linalg.pinv(b1[i], rcond=1e-10))
+
+
+def test_blockpinv_passthrough():
+
+    b1 = np.random.standard_normal((3, 4, 5))
+
+    # Extra arguments are deprecated, but still passed on to scipy
+    with pytest.warns(DeprecationWarning):
+        pb = blockla.pinv_dm(b1, check_finite=True)
+
+    for i in range(3):
+        assert np.allclose(pb[i], np.linalg.pinv(b1[i]))
@@ -0,0 +1,34 @@
+# === Start Python 2/3 compatibility
+from __future__ import absolute_import, division, print_function, unicode_literals
+from future.builtins import *  # noqa  pylint: disable=W0401, W0614
+from future.builtins.disabled import *  # noqa  pylint: disable=W0401, W0614
+
+# === End Python 2/3 compatibility
+
+
+from drift.util import util
+
+
+def test_threaded_map():
+
+    items = list(range(20))
+    expected = [x ** 2 for x in items]
+
+    # Check both the serial and threaded paths return results in order
+    assert list(util.threaded_map(lambda x: x ** 2, items)) == expected
+    assert list(util.threaded_map(lambda x: x ** 2, items, nthreads=3)) == expected
+
+
+def test_prefetch_map():
+
+    items = list(range(20))
+    expected = [x ** 2 for x in items]
+
+    assert list(util.prefetch_map(lambda x: x ** 2, items)) == expected
+    assert list(util.prefetch_map(lambda x: x ** 2, [])) == []
+
+    # Check it can feed into the threaded map
+    blocks = util.prefetch_map(lambda x: x ** 2, items)
+    assert list(util.threaded_map(lambda x: x + 1, blocks, nthreads=3)) == [
+        x + 1 for x in expected
+    ]